@@ -0,0 +1,425 @@
+"""
+Batch mode for the code roaster: roast every file in a repository.
+
+Usage:
+    python batch.py src/ "lib/**/*.py" --workers 4 --rpm 60 --output roast.md
+
+Directories are walked recursively, skipping DEFAULT_IGNORE, the patterns in
+each root's .gitignore and any --ignore patterns; only files with a known
+source extension are picked up from directories. Explicit files are taken as
+given; glob matches are filtered by the ignore patterns and the working
+directory's .gitignore. Files are roasted concurrently by a bounded worker
+pool that never starts more than --rpm requests per minute; files whose code
+was roasted before are answered from the roast cache without using a request
+slot (--no-cache forces fresh roasts). Large Python files are split into
+parts (see splitter.py) that are roasted as separate tasks. The results
+are written as JSONL or Markdown (chosen by the --output extension); progress
+and the timing summary go to stderr so a JSONL report can be piped.
+"""
+
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from roater import cached_roast, request_roast
+from splitter import split_code, merge_roasts
+
+DEFAULT_WORKERS = 4
+DEFAULT_RPM = 60
+
+DEFAULT_IGNORE = [
+    ".git/",
+    ".hg/",
+    ".svn/",
+    "__pycache__/",
+    "node_modules/",
+    ".venv/",
+    "venv/",
+    "build/",
+    "dist/",
+    "*.egg-info/",
+    "*.min.js",
+]
+
+SOURCE_EXTENSIONS = set(
+    ".py .js .jsx .ts .tsx .java .kt .go .rs .c .h .cpp .hpp .cc .cs .rb .php "
+    ".swift .scala .sh .sql".split()
+)
+
+
+def read_ignore_file(path):
+    """Read .gitignore-style patterns, skipping blanks, comments and negations."""
+    try:
+        with open(path, "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    return [
+        line.strip()
+        for line in lines
+        if line.strip() and not line.startswith(("#", "!"))
+    ]
+
+
+def is_ignored(relative_path, is_dir, patterns):
+    """
+    Check a path against .gitignore-style patterns.
+
+    A trailing "/" restricts a pattern to directories, a leading "/" anchors it
+    to the walked root, and unanchored patterns without a "/" match any name.
+    """
+    relative_path = relative_path.replace(os.sep, "/")
+    name = relative_path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        if pattern.endswith("/"):
+            if not is_dir:
+                continue
+            pattern = pattern.rstrip("/")
+        if pattern.startswith("/"):
+            if fnmatch.fnmatch(relative_path, pattern.lstrip("/")):
+                return True
+        elif "/" in pattern:
+            if fnmatch.fnmatch(relative_path, pattern):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+
+def in_ignored_path(path, patterns):
+    """Check whether a file or any directory above it is ignored."""
+    parts = os.path.normpath(path).split(os.sep)
+    for depth in range(1, len(parts)):
+        if is_ignored("/".join(parts[:depth]), True, patterns):
+            return True
+    return is_ignored("/".join(parts), False, patterns)
+
+
+def walk_directory(root, patterns):
+    """Yield the source files under root that no ignore pattern matches."""
+    patterns = patterns + read_ignore_file(os.path.join(root, ".gitignore"))
+    for dirpath, dirnames, filenames in os.walk(root):
+        relative_dir = os.path.relpath(dirpath, root)
+        relative_dir = "" if relative_dir == "." else relative_dir + "/"
+        dirnames[:] = sorted(
+            d for d in dirnames if not is_ignored(relative_dir + d, True, patterns)
+        )
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1] not in SOURCE_EXTENSIONS:
+                continue
+            if not is_ignored(relative_dir + filename, False, patterns):
+                yield os.path.join(dirpath, filename)
+
+
+def collect_files(paths, ignore=()):
+    """
+    Expand paths, directories and globs into a de-duplicated list of files.
+
+    Args:
+        paths: File paths, directories or glob patterns ("**" is recursive)
+        ignore: Extra .gitignore-style patterns applied to directory walks
+
+    Returns:
+        File paths in the order they were found
+    """
+    patterns = DEFAULT_IGNORE + list(ignore)
+    glob_patterns = patterns + read_ignore_file(".gitignore")
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(walk_directory(path, patterns))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            for match in sorted(glob.glob(path, recursive=True)):
+                if os.path.isdir(match):
+                    files.extend(walk_directory(match, patterns))
+                elif not in_ignored_path(match, glob_patterns):
+                    files.append(match)
+    return list(dict.fromkeys(os.path.normpath(f) for f in files))
+
+
+class RateLimiter:
+    """Spaces request starts evenly so at most rpm begin in any minute."""
+
+    def __init__(self, rpm):
+        self.interval = 60.0 / rpm if rpm else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next request slot is free."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def read_file(path):
+    """
+    Read one file and plan its roast.
+
+    Returns:
+        Result dict with the path and size, plus the (label, code) "parts" to
+        roast (large Python files are split), or a skipped/error status
+    """
+    result = {"path": path}
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            code = f.read()
+    except OSError as e:
+        result.update(status="error", latency_ms=0.0, error=str(e))
+        return result
+    result["chars"] = len(code)
+    if not code.strip():
+        result.update(status="skipped", latency_ms=0.0, error="empty file")
+        return result
+    parts = split_code(code) if path.endswith(".py") else None
+    result["parts"] = parts or [(None, code)]
+    return result
+
+
+def roast_part(code, limiter, use_cache=True):
+    """
+    Roast one file or part, from the cache when possible.
+
+    Returns:
+        Dict with the roast, whether it was cached, and its start/end times
+    """
+    start = time.perf_counter()
+    roast = cached_roast(code) if use_cache else None
+    cached = roast is not None
+    if roast is None:
+        # Only API calls take a rate limit slot; waiting is not latency
+        limiter.wait()
+        start = time.perf_counter()
+        roast = request_roast(code, use_cache=False)
+    return {
+        "roast": roast,
+        "cached": cached,
+        "start": start,
+        "end": time.perf_counter(),
+    }
+
+
+def finish_file(result, outcomes):
+    """Merge the outcomes (dicts or exceptions) of a file's parts into its result."""
+    parts = result.pop("parts")
+    succeeded = [o for o in outcomes if not isinstance(o, Exception)]
+    failed = [o for o in outcomes if isinstance(o, Exception)]
+    result["parts"] = len(parts)
+    result["latency_ms"] = (
+        (max(o["end"] for o in succeeded) - min(o["start"] for o in succeeded)) * 1000
+        if succeeded
+        else 0.0
+    )
+    if failed:
+        result["status"] = "error"
+        result["error"] = str(failed[0])
+        return result
+    result["status"] = "ok"
+    result["cached"] = all(o["cached"] for o in outcomes)
+    if len(parts) == 1:
+        result["roast"] = outcomes[0]["roast"]
+    else:
+        result["roast"] = merge_roasts(parts, [o["roast"] for o in outcomes])
+    return result
+
+
+def roast_files(files, workers=DEFAULT_WORKERS, rpm=DEFAULT_RPM, use_cache=True):
+    """
+    Roast files concurrently, printing progress as each one finishes.
+
+    Every part of a split file is a separate task in the pool, so one large
+    file is roasted by several workers at once.
+
+    Returns:
+        Tuple of (results in input order, wall time in seconds)
+    """
+    start = time.perf_counter()
+    planned = [read_file(path) for path in files]
+    results = roast_planned(planned, workers=workers, rpm=rpm, use_cache=use_cache)
+    return results, time.perf_counter() - start
+
+
+def roast_planned(planned, workers=DEFAULT_WORKERS, rpm=DEFAULT_RPM, use_cache=True):
+    """
+    Roast planned results (see read_file) and merge each one's parts.
+
+    Returns:
+        Finished result dicts in the planned order
+    """
+    limiter = RateLimiter(rpm)
+    # Keyed by position: labels (e.g. two changed __init__ methods) may repeat
+    outcomes = {}
+    results = {}
+
+    def report(index, result):
+        results[index] = result
+        mark = {"ok": "✓", "skipped": "-"}.get(result["status"], "✗")
+        detail = result.get("error", f"{result['latency_ms']:.0f} ms")
+        if result.get("parts", 1) > 1:
+            detail += f", {result['parts']} parts"
+        if result.get("cached"):
+            detail += " (cached)"
+        print(
+            f"[{len(results)}/{len(planned)}] {mark} {result['path']}: {detail}",
+            file=sys.stderr,
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for position, result in enumerate(planned):
+            if "parts" not in result:
+                report(position, result)
+                continue
+            outcomes[position] = [None] * len(result["parts"])
+            for index, (_, code) in enumerate(result["parts"]):
+                future = pool.submit(roast_part, code, limiter, use_cache)
+                futures[future] = (position, index)
+
+        for future in as_completed(futures):
+            position, index = futures[future]
+            try:
+                outcomes[position][index] = future.result()
+            except Exception as e:
+                outcomes[position][index] = e
+            if all(outcome is not None for outcome in outcomes[position]):
+                report(position, finish_file(planned[position], outcomes[position]))
+
+    return [results[position] for position in range(len(planned))]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (0.0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(results, seconds):
+    """Build the run summary: counts, wall time and per-file latency."""
+    latencies = [r["latency_ms"] for r in results if r["status"] == "ok"]
+    return {
+        "files": len(results),
+        "roasted": len(latencies),
+        "cached": sum(bool(r.get("cached")) for r in results),
+        "skipped": sum(r["status"] == "skipped" for r in results),
+        "failed": sum(r["status"] == "error" for r in results),
+        "wall_seconds": seconds,
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "max_ms": max(latencies, default=0.0),
+    }
+
+
+def write_jsonl(results, f):
+    """Write one JSON object per file."""
+    for result in results:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def write_markdown(results, summary, f):
+    """Write a Markdown report with a latency table and each file's roast."""
+    f.write("# 🔥 Code Roast Report\n\n")
+    f.write(
+        f"{summary['roasted']} of {summary['files']} files roasted in "
+        f"{summary['wall_seconds']:.1f}s "
+        f"(p50 {summary['p50_ms']:.0f} ms, p95 {summary['p95_ms']:.0f} ms)\n\n"
+    )
+    f.write("| File | Status | Latency (ms) |\n|---|---|---|\n")
+    for result in results:
+        f.write(
+            f"| `{result['path']}` | {result['status']} | "
+            f"{result['latency_ms']:.0f} |\n"
+        )
+    for result in results:
+        f.write(f"\n## `{result['path']}`\n\n")
+        if result["status"] == "ok":
+            f.write(result["roast"].strip() + "\n")
+        else:
+            f.write(f"_{result['status']}: {result.get('error', '')}_\n")
+
+
+def print_summary(summary):
+    """Print wall time, per-file latency and failure counts to stderr."""
+    print("-" * 50, file=sys.stderr)
+    print(
+        f"Roasted {summary['roasted']}/{summary['files']} files "
+        f"({summary['cached']} cached, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed) "
+        f"in {summary['wall_seconds']:.1f}s",
+        file=sys.stderr,
+    )
+    print(
+        f"Per-file latency: p50 {summary['p50_ms']:.0f} ms, "
+        f"p95 {summary['p95_ms']:.0f} ms, max {summary['max_ms']:.0f} ms",
+        file=sys.stderr,
+    )
+
+
+def main():
+    """Batch roasting flow."""
+    parser = argparse.ArgumentParser(description="Roast many files at once.")
+    parser.add_argument("paths", nargs="+", help="Files, directories or globs")
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        default=[],
+        help=".gitignore-style pattern to skip (repeatable)",
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--rpm", type=int, default=DEFAULT_RPM, help="Max requests per minute"
+    )
+    parser.add_argument(
+        "--output",
+        help="Report path; .md writes Markdown, anything else JSONL (default: stdout)",
+    )
+    parser.add_argument("--format", choices=["jsonl", "md"])
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached roasts")
+    args = parser.parse_args()
+
+    files = collect_files(args.paths, args.ignore)
+    if not files:
+        print("No files to roast.")
+        return
+
+    print(
+        f"🔥 Roasting {len(files)} files with {args.workers} workers...",
+        file=sys.stderr,
+    )
+    results, seconds = roast_files(
+        files, workers=args.workers, rpm=args.rpm, use_cache=not args.no_cache
+    )
+    summary = summarize(results, seconds)
+
+    report_format = args.format
+    if report_format is None:
+        report_format = "md" if (args.output or "").endswith(".md") else "jsonl"
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if report_format == "md":
+            write_markdown(results, summary, out)
+        else:
+            write_jsonl(results, out)
+    finally:
+        if args.output:
+            out.close()
+
+    print_summary(summary)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
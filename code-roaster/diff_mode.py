@@ -0,0 +1,321 @@
+"""
+Diff-aware roasting: roast only the code a change touches.
+
+Usage:
+    git diff -U0 | python diff_mode.py
+    python diff_mode.py --range main..HEAD --output review.md
+    python diff_mode.py --staged          # pre-commit hook
+
+The unified diff is mapped onto the new version of each file. In Python files
+every changed line is attributed to the innermost function or class around
+it, and that definition is roasted whole when it is short; otherwise, and for
+other languages or module-level code, only the changed lines plus a few lines
+of context are sent. Requests therefore scale with the size of the change,
+not the size of the files. Roasting reuses the batch pool, rate limiter, cache
+and reports from batch.py.
+"""
+
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+import time
+
+from batch import (
+    DEFAULT_RPM,
+    DEFAULT_WORKERS,
+    roast_planned,
+    summarize,
+    print_summary,
+    write_jsonl,
+    write_markdown,
+)
+
+# Lines of unchanged code sent around changes outside a short definition
+DIFF_CONTEXT_LINES = 5
+
+# Definitions longer than this are not sent whole, only around the changes
+DIFF_MAX_UNIT_LINES = 80
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+def parse_diff(text):
+    """
+    Parse a unified diff into the changed lines of each new file.
+
+    Returns:
+        Dict of new path -> {"lines": set of changed new-side line numbers,
+        "added": {line number: text}, "hunks": [hunk text]}; deleted files are
+        left out, and a pure deletion marks the line now at its position
+    """
+    files = {}
+    current = None
+    new_line = 0
+    lines = text.splitlines()
+    for index, line in enumerate(lines):
+        next_line = lines[index + 1] if index + 1 < len(lines) else ""
+        if line.startswith("diff ") or (
+            line.startswith("--- ") and next_line.startswith("+++ ")
+        ):
+            current = None  # A new file's header
+            continue
+        if line.startswith("+++ ") and current is None:
+            path = line[4:].split("\t")[0].strip()
+            if path == "/dev/null":
+                continue
+            if path.startswith("b/"):
+                path = path[2:]
+            current = files.setdefault(path, {"lines": set(), "added": {}, "hunks": []})
+            continue
+        if current is None:
+            continue
+        match = _HUNK_HEADER.match(line)
+        if match:
+            new_line = int(match.group(1))
+            current["hunks"].append([line])
+        elif current["hunks"] and line[:1] in ("+", "-", " "):
+            current["hunks"][-1].append(line)
+            if line.startswith("+"):
+                current["lines"].add(new_line)
+                current["added"][new_line] = line[1:]
+                new_line += 1
+            elif line.startswith("-"):
+                current["lines"].add(max(new_line, 1))
+            else:
+                new_line += 1
+    for changes in files.values():
+        changes["hunks"] = ["\n".join(hunk) for hunk in changes["hunks"]]
+    return files
+
+
+def _git(*args):
+    return subprocess.run(
+        ["git", *args], capture_output=True, text=True, check=True
+    ).stdout
+
+
+def repo_root():
+    """Return the top-level directory of the current git repository, or None."""
+    try:
+        return _git("rev-parse", "--show-toplevel").strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_new_version(path, revision=None, root=None):
+    """
+    Return a file's content after the change, or None if it is unavailable.
+
+    Args:
+        path: Repository-relative path
+        revision: Git revision to read it from, ":" for the index, or None for
+            the working tree
+        root: Repository root that working-tree paths are relative to; paths
+            are tried relative to the current directory when it is None or
+            the file is not there
+    """
+    try:
+        if revision is None:
+            candidates = [os.path.join(root, path)] if root is not None else []
+            candidates.append(path)
+            for candidate in candidates:
+                if os.path.isfile(candidate):
+                    with open(candidate, "r", encoding="utf-8", errors="replace") as f:
+                        return f.read()
+            return None
+        if revision == ":":
+            return _git("show", f":{path}")
+        return _git("show", f"{revision}:{path}")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _matches(content_lines, added):
+    """Check that the diff's added lines are really in this content."""
+    return all(
+        0 < number <= len(content_lines) and content_lines[number - 1] == text
+        for number, text in added.items()
+    )
+
+
+def _windows(lines, context, limit):
+    """Merge [line - context, line + context] ranges into sorted spans."""
+    spans = []
+    for line in sorted(lines):
+        start, end = max(1, line - context), min(limit, line + context)
+        if spans and start <= spans[-1][1] + 1:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    return spans
+
+
+def _compact(lines):
+    """Format line numbers as ranges, e.g. "3-5, 9"."""
+    spans = _windows(lines, 0, max(lines))
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in spans)
+
+
+def _definitions(tree):
+    """Return (first line, last line, label) of every function and class."""
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            kind = "class" if isinstance(node, ast.ClassDef) else "def"
+            first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            found.append((first, node.end_lineno, f"{kind} {node.name}"))
+    return found
+
+
+def changed_units(path, content, changes, context=DIFF_CONTEXT_LINES):
+    """
+    Work out which pieces of a changed file to roast.
+
+    Args:
+        path: File path, used in labels
+        content: New file content, or None if unavailable
+        changes: parse_diff() entry for the file
+        context: Unchanged lines to include around changes
+
+    Returns:
+        List of (label, code) in file order
+    """
+    content_lines = content.splitlines() if content is not None else None
+    if content_lines is None or not _matches(content_lines, changes["added"]):
+        # No trustworthy new version: the hunks are the best context we have
+        return [
+            (f"{path}: hunk {index}", f"# Diff of {path}\n{hunk}\n")
+            for index, hunk in enumerate(changes["hunks"], start=1)
+        ]
+
+    changed = {min(line, len(content_lines)) for line in changes["lines"]}
+    if not changed:
+        return []
+    definitions = []
+    if path.endswith(".py"):
+        try:
+            definitions = _definitions(ast.parse(content))
+        except (SyntaxError, ValueError):
+            pass
+
+    # Attribute each changed line to the innermost definition around it
+    by_definition = {}
+    for line in changed:
+        around = [d for d in definitions if d[0] <= line <= d[1]]
+        owner = min(around, key=lambda d: d[1] - d[0]) if around else None
+        by_definition.setdefault(owner, set()).add(line)
+
+    units = []
+    for owner, lines in by_definition.items():
+        if owner is not None and owner[1] - owner[0] < DIFF_MAX_UNIT_LINES:
+            spans = [(owner[0], owner[1], owner[2], f"{path}:{owner[0]} {owner[2]}")]
+        else:
+            spans = [
+                (start, end, f"lines {start}-{end}", f"{path}:{start}-{end}")
+                for start, end in _windows(lines, context, len(content_lines))
+            ]
+        # Labels carry the start line so same-named definitions stay distinct
+        for start, end, name, label in spans:
+            inside = {line for line in lines if start <= line <= end}
+            header = f"# {path}, {name} (changed lines: {_compact(inside)})\n"
+            if owner is not None and start > owner[0]:
+                # Keep the signature of the definition the excerpt sits in
+                header += content_lines[owner[0] - 1] + "\n    ...\n"
+            code = header + "\n".join(content_lines[start - 1 : end]) + "\n"
+            units.append((start, label, code))
+    return [(label, code) for _, label, code in sorted(units)]
+
+
+def plan_diff(diff_text, revision=None, context=DIFF_CONTEXT_LINES):
+    """
+    Turn a diff into planned results for batch.roast_planned().
+
+    Returns:
+        Tuple of (planned result dicts, total characters of the changed files)
+    """
+    planned = []
+    file_chars = 0
+    # git diff paths are relative to the repository root, not the current directory
+    root = repo_root() if revision is None else None
+    for path, changes in parse_diff(diff_text).items():
+        content = read_new_version(path, revision, root)
+        file_chars += len(content) if content is not None else 0
+        for label, code in changed_units(path, content, changes, context):
+            planned.append({"path": label, "chars": len(code), "parts": [(None, code)]})
+    return planned, file_chars
+
+
+def main():
+    """Diff roasting flow."""
+    parser = argparse.ArgumentParser(description="Roast only the changed code.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--diff", help="Unified diff file ('-' for stdin)")
+    source.add_argument("--range", help="Git revision range, e.g. main..HEAD")
+    source.add_argument(
+        "--staged", action="store_true", help="Roast the staged changes"
+    )
+    parser.add_argument("--context", type=int, default=DIFF_CONTEXT_LINES)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--rpm", type=int, default=DEFAULT_RPM, help="Max requests per minute"
+    )
+    parser.add_argument(
+        "--output",
+        help="Report path; .md writes Markdown, anything else JSONL (default: stdout)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached roasts")
+    args = parser.parse_args()
+
+    revision = None
+    if args.range:
+        diff_text = _git("diff", "-U0", args.range)
+        if ".." in args.range:
+            revision = args.range.split("..")[-1].lstrip(".") or "HEAD"
+    elif args.staged:
+        diff_text = _git("diff", "--cached", "-U0")
+        revision = ":"
+    elif args.diff and args.diff != "-":
+        with open(args.diff, "r") as f:
+            diff_text = f.read()
+    elif args.diff == "-" or not sys.stdin.isatty():
+        diff_text = sys.stdin.read()
+    else:
+        diff_text = _git("diff", "-U0", "HEAD")
+
+    planned, file_chars = plan_diff(diff_text, revision, args.context)
+    if not planned:
+        print("Nothing changed. Suspicious.")
+        return
+
+    sent_chars = sum(result["chars"] for result in planned)
+    print(
+        f"🔥 Roasting {len(planned)} changed pieces "
+        f"({sent_chars} of {file_chars} chars in the touched files)...",
+        file=sys.stderr,
+    )
+    start = time.perf_counter()
+    results = roast_planned(
+        planned, workers=args.workers, rpm=args.rpm, use_cache=not args.no_cache
+    )
+    summary = summarize(results, time.perf_counter() - start)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if (args.output or "").endswith(".md"):
+            write_markdown(results, summary, out)
+        else:
+            write_jsonl(results, out)
+    finally:
+        if args.output:
+            out.close()
+
+    print_summary(summary)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
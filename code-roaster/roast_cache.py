@@ -0,0 +1,99 @@
+"""
+Roast cache module for persisting roasts on disk.
+
+Roasts are keyed by a hash of (model name, prompt template, normalized code),
+so re-roasting an unchanged file costs a local lookup instead of an API call,
+while changing the model or the prompt naturally invalidates old entries.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+ROAST_CACHE_PATH = os.getenv(
+    "ROAST_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "roast_cache.sqlite3"),
+)
+ROAST_CACHE_MAX_ENTRIES = int(os.getenv("ROAST_CACHE_MAX_ENTRIES", "5000"))
+
+
+def normalize_code(code):
+    """Normalize line endings and trailing whitespace so cosmetic edits still hit."""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+class RoastCache:
+    """
+    Content-addressed, size-bounded LRU cache of roasts backed by SQLite.
+
+    Safe to share between threads; least recently used entries are evicted
+    once the cache holds more than max_entries roasts.
+    """
+
+    def __init__(self, path=ROAST_CACHE_PATH, max_entries=ROAST_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS roasts ("
+            "key TEXT PRIMARY KEY, roast TEXT NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS roasts_last_used ON roasts (last_used)"
+        )
+        row = self._conn.execute("SELECT MAX(last_used) FROM roasts").fetchone()
+        self._clock = row[0] or 0
+
+    @staticmethod
+    def key(model_name, prompt_template, code):
+        """Hash the model, prompt template and normalized code into a cache key."""
+        digest = hashlib.sha256()
+        for part in (model_name, prompt_template, normalize_code(code)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get(self, key):
+        """Return the cached roast for a key, or None on a miss."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT roast FROM roasts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE roasts SET last_used = ? WHERE key = ?", (self._tick(), key)
+            )
+        return row[0]
+
+    def put(self, key, roast):
+        """Store a roast and evict the least recently used overflow."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO roasts (key, roast, last_used) VALUES (?, ?, ?)",
+                (key, roast, self._tick()),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM roasts").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM roasts WHERE key IN ("
+                    "SELECT key FROM roasts ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def stats(self):
+        """Return hit/miss counters and the current number of cached roasts."""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM roasts").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "size": size}
@@ -1,6 +1,10 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import google.generativeai as genai
 from dotenv import load_dotenv
+from roast_cache import RoastCache
+from splitter import split_code, merge_roasts
 
 # 1. Load environment variables (Like dotenv.config() in Node)
 load_dotenv()
@@ -12,16 +16,18 @@ if not api_key:
 
 genai.configure(api_key=api_key)
 
-model = genai.GenerativeModel("gemini-2.5-flash")
+MODEL_NAME = "gemini-2.5-flash"
 
+# Parts of a large file roasted at the same time
+ROAST_WORKERS = int(os.getenv("ROAST_WORKERS", "4"))
 
-def roast_my_code(user_code):
-    """
-    Sends code to the AI with a specific persona.
-    """
+model = genai.GenerativeModel(MODEL_NAME)
+
+# 3. Persistent cache so unchanged code is never roasted twice
+cache = RoastCache()
 
-    # The "System Prompt" - This sets the behavior/personality
-    prompt = f"""
+# The "System Prompt" - This sets the behavior/personality
+PROMPT_TEMPLATE = """
     You are a cynical, sarcastic Senior Software Engineer who has seen too much bad code.
     
     Your task:
@@ -34,12 +40,58 @@ def roast_my_code(user_code):
     {user_code}
     """
 
+
+def cached_roast(user_code):
+    """
+    Returns the cached roast for this code, or None if it was never roasted.
+    """
+    return cache.get(RoastCache.key(MODEL_NAME, PROMPT_TEMPLATE, user_code))
+
+
+def request_roast(user_code, use_cache=True):
+    """
+    Sends code to the AI and returns the roast, raising if the call fails.
+    Unchanged code is served from the cache unless use_cache is False.
+    """
+    key = RoastCache.key(MODEL_NAME, PROMPT_TEMPLATE, user_code)
+    if use_cache:
+        roast = cache.get(key)
+        if roast is not None:
+            return roast
+
+    prompt = PROMPT_TEMPLATE.format(user_code=user_code)
+    response = model.generate_content(prompt)
+    cache.put(key, response.text)
+    return response.text
+
+
+def roast_parts(parts, use_cache=True, workers=ROAST_WORKERS):
+    """
+    Roasts the parts of a split file in parallel and merges them in order.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        roasts = list(
+            pool.map(lambda part: request_roast(part[1], use_cache=use_cache), parts)
+        )
+    return merge_roasts(parts, roasts)
+
+
+def roast_my_code(user_code, use_cache=True):
+    """
+    Sends code to the AI with a specific persona.
+    Large Python files are split along top-level definitions and the parts
+    are roasted in parallel.
+    """
+
     print("\n👀 Senior Dev is looking at your code...\n")
 
-    # 4. Call the API
+    # 4. Call the API (or reuse the roast of identical code)
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        parts = split_code(user_code)
+        if parts is None:
+            return request_roast(user_code, use_cache=use_cache)
+        print(f"✂️  That's a big one. Roasting it in {len(parts)} parts...\n")
+        return roast_parts(parts, use_cache=use_cache)
     except Exception as e:
         return f"Error: The AI refused to roast you. Reason: {e}"
 
@@ -57,7 +109,8 @@ if __name__ == "__main__":
     user_input = sys.stdin.read()
 
     if user_input.strip():
-        result = roast_my_code(user_input)
+        # Pass --no-cache to always get a fresh roast
+        result = roast_my_code(user_input, use_cache="--no-cache" not in sys.argv[1:])
         print("-" * 50)
         print(result)
         print("-" * 50)
@@ -0,0 +1,131 @@
+"""
+AST-aware splitting of large Python files into separately roastable parts.
+
+A file over the size threshold is cut at top-level statement boundaries:
+functions and classes (with their decorators and leading comments) and any
+other module-level code. Consecutive pieces are packed into parts of about
+SPLIT_PART_CHARS, and every part carries the file's imports and short
+module-level assignments so it can be understood on its own.
+
+Parts are cached by their text, so that text holds no line numbers or part
+counts, and part boundaries depend only on nearby pieces: a part also ends
+after any piece whose name hashes onto an anchor, so when an edit shifts the
+packing, the shift stops at the next anchor and later parts are unchanged.
+"""
+
+import ast
+import os
+import zlib
+
+SPLIT_THRESHOLD_CHARS = int(os.getenv("ROAST_SPLIT_THRESHOLD", "8000"))
+
+# Target size of one part; fixed, so boundaries do not depend on the file size
+SPLIT_PART_CHARS = int(os.getenv("ROAST_SPLIT_PART_CHARS", "3000"))
+
+# On average one piece in this many ends a part regardless of its size
+_ANCHOR_EVERY = 4
+
+# Module-level assignments up to this size are shared context, not roasted
+_CONTEXT_MAX_CHARS = 300
+
+
+def _label(node):
+    if isinstance(node, ast.ClassDef):
+        return f"class {node.name}"
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return f"def {node.name}"
+    return f"module code (line {node.lineno})"
+
+
+def _pieces(code):
+    """
+    Parse code into shared context and top-level pieces.
+
+    Returns:
+        Tuple of (context source, list of (label, first line, last line, source)),
+        or None if the code is not valid Python
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines = code.splitlines(keepends=True)
+    context = []
+    pieces = []
+    previous_end = 0
+    for node in tree.body:
+        # Leading comments and decorators belong to the statement below them
+        source = "".join(lines[previous_end : node.end_lineno]).lstrip("\n")
+        previous_end = node.end_lineno
+        is_context = isinstance(node, (ast.Import, ast.ImportFrom)) or (
+            isinstance(node, (ast.Assign, ast.AnnAssign, ast.Expr))
+            and len(source) <= _CONTEXT_MAX_CHARS
+        )
+        if is_context:
+            context.append(source)
+        else:
+            decorators = getattr(node, "decorator_list", [])
+            first = min([node.lineno] + [d.lineno for d in decorators])
+            pieces.append((_label(node), first, node.end_lineno, source))
+    return "".join(context), pieces
+
+
+def _is_anchor(piece):
+    return zlib.crc32(piece[0].encode("utf-8")) % _ANCHOR_EVERY == 0
+
+
+def split_code(code, threshold=SPLIT_THRESHOLD_CHARS, part_chars=SPLIT_PART_CHARS):
+    """
+    Split large Python code into parts to roast independently.
+
+    Args:
+        code: Source code
+        threshold: Size in characters above which code is split
+        part_chars: Target size of each part's own code
+
+    Returns:
+        List of (label, part source) in file order, or None when the code is
+        small enough, not Python, or has a single top-level piece
+    """
+    if len(code) <= threshold:
+        return None
+    parsed = _pieces(code)
+    if parsed is None:
+        return None
+    context, pieces = parsed
+    if len(pieces) < 2:
+        return None
+
+    # Pack consecutive pieces up to the part size, closing parts at anchors
+    groups = []
+    size = 0
+    closed = True
+    for piece in pieces:
+        if closed or size + len(piece[3]) > part_chars:
+            groups.append([])
+            size = 0
+        groups[-1].append(piece)
+        size += len(piece[3])
+        closed = _is_anchor(piece)
+
+    parts = []
+    for index, group in enumerate(groups, start=1):
+        position = f"part {index}/{len(groups)}, lines {group[0][1]}-{group[-1][2]}"
+        label = f"{position.capitalize()}: " + ", ".join(p[0] for p in group)
+        source = (
+            "# Excerpt from a larger file; imports and module context come first\n"
+            + context
+            + "\n# --- part starts here ---\n\n"
+            + "\n\n".join(p[3].rstrip("\n") for p in group)
+            + "\n"
+        )
+        parts.append((label, source))
+    return parts
+
+
+def merge_roasts(parts, roasts):
+    """Merge the roasts of split parts into one report, in file order."""
+    return "\n\n".join(
+        f"### {label}\n\n{roast.strip()}" for (label, _), roast in zip(parts, roasts)
+    )
@@ -0,0 +1,155 @@
+"""
+Answer cache module for reusing answers to repeated questions.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from metrics import span
+from config import (
+    ANSWER_CACHE_PATH,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_TTL,
+    ANSWER_CACHE_MAX_ENTRIES,
+)
+
+
+def normalize_question(question):
+    """Lowercase a question and strip whitespace and trailing punctuation noise."""
+    question = re.sub(r"\s+", " ", question.lower()).strip()
+    return question.rstrip("?!. ")
+
+
+def collection_key(video_ids):
+    """Cache scope for questions asked across several videos."""
+    digest = hashlib.sha1(",".join(sorted(video_ids)).encode("utf-8")).hexdigest()
+    return f"collection:{digest[:16]}"
+
+
+class AnswerCache:
+    """
+    Per-video answer cache with exact and near-duplicate matching.
+
+    Answers are stored in SQLite so every Streamlit session and CLI process
+    shares them. A question is served from the cache when its normalized text
+    matches exactly, or when its embedding has cosine similarity of at least
+    `threshold` with a cached question for the same video.
+    """
+
+    def __init__(
+        self,
+        path=ANSWER_CACHE_PATH,
+        threshold=ANSWER_CACHE_SIMILARITY,
+        ttl=ANSWER_CACHE_TTL,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "video_id TEXT NOT NULL, question_hash TEXT NOT NULL, "
+                "vector BLOB NOT NULL, answer TEXT NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL, "
+                "PRIMARY KEY (video_id, question_hash))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)"
+            )
+
+    @staticmethod
+    def _hash(question):
+        return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+    def get(self, video_id, question, embedding=None):
+        """
+        Look up a cached answer for a question about a video.
+
+        Args:
+            video_id: YouTube video ID
+            question: User question
+            embedding: Query embedding of the question, or None to only look
+                for the exact normalized question, without embedding it
+
+        Returns:
+            Cached answer text, or None on a miss
+        """
+        now = time.time()
+        with span("answer_cache") as record, self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM answers WHERE created < ?", (now - self.ttl,)
+            )
+            row = self._conn.execute(
+                "SELECT question_hash, answer FROM answers "
+                "WHERE video_id = ? AND question_hash = ?",
+                (video_id, self._hash(question)),
+            ).fetchone()
+
+            if row is None and embedding is not None:
+                # Answers stored without an embedding only match exactly
+                rows = self._conn.execute(
+                    "SELECT question_hash, answer, vector FROM answers "
+                    "WHERE video_id = ? AND length(vector) > 0",
+                    (video_id,),
+                ).fetchall()
+                if rows:
+                    query = np.asarray(embedding, dtype=np.float32)
+                    query /= max(float(np.linalg.norm(query)), 1e-12)
+                    vectors = np.stack(
+                        [
+                            np.frombuffer(vector, dtype=np.float32)
+                            for _, _, vector in rows
+                        ]
+                    )
+                    scores = vectors @ query
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        row = rows[best][:2]
+
+            record["hit"] = row is not None
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE answers SET last_used = ? WHERE video_id = ? AND question_hash = ?",
+                (now, video_id, row[0]),
+            )
+            return row[1]
+
+    def put(self, video_id, question, embedding, answer):
+        """
+        Store an answer and evict the least recently used overflow.
+
+        An embedding of None stores the answer for exact repeats only.
+        """
+        if embedding is None:
+            embedding = []
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(video_id, question_hash, vector, answer, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, self._hash(question), vector.tobytes(), answer, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM answers WHERE rowid IN ("
+                    "SELECT rowid FROM answers ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
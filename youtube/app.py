@@ -3,14 +3,35 @@ Streamlit UI for YouTube Transcript Downloader
 A modern web interface for processing YouTube videos and asking questions.
 """
 
+import time
+
 import streamlit as st
-from transcript import ApiCall, extract_video_id
-from chunking import splitText
-from data_manager import load_data, save_data, add_transcript
-from pinecone_manager import initialize_pinecone, upload_to_pinecone, search_similar
-from llm_handler import initialize_llm, query_llm
+from transcript import fetchTranscript, cleanData, extract_video_id
+from chunking import iterTranscriptChunks
+from data_manager import (
+    load_data,
+    save_data,
+    add_transcript,
+    get_transcript,
+    get_timings,
+    is_indexed,
+    mark_indexed,
+    ingest_state,
+    ingest_states,
+)
+from pinecone_manager import initialize_vector_store
+from pipeline import stream_upload, cached_chunk_stream
+from llm_handler import initialize_llm, stream_llm
+from answer_cache import AnswerCache, collection_key
+from summary_cache import SummaryCache
+from summarizer import Summarizer
+from lexical_index import get_lexical_index, keyword_search
+from retrieval import retrieve
+from metrics import span, observe, trace, rolling_percentiles, prometheus_text
 from config import SEARCH_K
 
+# Script start, for the per-rerun latency recorded at the bottom of the page
+_rerun_start = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -164,73 +185,169 @@ st.markdown(
 )
 
 
+@st.cache_resource(show_spinner="🔧 Initializing services...")
 def initialize_services():
-    """Initialize vector store and LLM (cached in session state)."""
-    if "vector_store" not in st.session_state:
-        with st.spinner("🔧 Initializing services..."):
-            st.session_state.vector_store = initialize_pinecone()
-            st.session_state.llm = initialize_llm()
-            st.session_state.data = load_data()
+    """
+    Initialize vector store, LLM and caches once per process.
+
+    Every browser session shares the returned clients; all of them are safe
+    to use from concurrent script runs.
+    """
+    with span("init_services"):
+        data = load_data()
+        # The BM25 index reads transcripts from the same store
+        get_lexical_index(data)
+        return {
+            "vector_store": initialize_vector_store(),
+            "llm": initialize_llm(),
+            "data": data,
+            "answer_cache": AnswerCache(),
+            "summary_cache": SummaryCache(),
+        }
 
 
 def process_video(youtube_url):
-    """Process a YouTube video: fetch, chunk, and upload to Pinecone."""
+    """Process a YouTube video: fetch, then chunk and upload as a stream."""
+    video_id = None
     try:
         video_id = extract_video_id(youtube_url)
 
-        with st.spinner(f"📺 Fetching transcript for video: {video_id}..."):
-            transcript = ApiCall(video_id, st.session_state.data)
-
-        if not transcript:
-            st.error("❌ Failed to fetch transcript. Please check the URL.")
-            return None
-
-        st.success(f"✅ Transcript fetched: {len(transcript)} characters")
+        cached_chunks = get_transcript(services["data"], video_id)
+        if cached_chunks is not None:
+            # Cached transcripts are stored already chunked
+            chunks = cached_chunks
+            timings = get_timings(services["data"], video_id)
+            transcript = " ".join(chunks)
+            st.success(f"✅ Transcript loaded from cache: {len(transcript)} characters")
+
+            # Upload, unless these exact chunks are already indexed
+            if is_indexed(services["data"], video_id, chunks):
+                st.info("⚡ Video already indexed, skipping upload")
+            else:
+                with st.spinner("☁️ Uploading to vector database..."):
+                    stream_upload(
+                        services["vector_store"],
+                        video_id,
+                        cached_chunk_stream(chunks, timings),
+                        data=services["data"],
+                    )
+                mark_indexed(services["data"], video_id, chunks)
+                save_data(services["data"])
+        else:
+            with st.spinner(f"📺 Fetching transcript for video: {video_id}..."):
+                snippets = fetchTranscript(video_id)
+            transcript = cleanData(snippets)
+
+            if not transcript:
+                st.error("❌ Failed to fetch transcript. Please check the URL.")
+                return None
+
+            st.success(f"✅ Transcript fetched: {len(transcript)} characters")
+
+            # Split into timed chunks, embedding and uploading them as they come
+            with st.spinner("☁️ Splitting and uploading to vector database..."):
+                chunks, timings = stream_upload(
+                    services["vector_store"],
+                    video_id,
+                    iterTranscriptChunks(snippets),
+                    data=services["data"],
+                )
 
-        # Split into chunks
-        with st.spinner("✂️ Splitting into chunks..."):
-            chunks = splitText(transcript)
+            # Save to cache
+            add_transcript(services["data"], video_id, chunks, timings)
+            get_lexical_index().add_video(video_id, chunks, timings)
+            mark_indexed(services["data"], video_id, chunks)
+            save_data(services["data"])
 
         st.info(f"📄 Split into {len(chunks)} chunks")
 
-        # Save to cache
-        st.session_state.data = add_transcript(st.session_state.data, video_id, chunks)
-        save_data(st.session_state.data)
-
-        # Upload to Pinecone
-        with st.spinner("☁️ Uploading to vector database..."):
-            upload_to_pinecone(st.session_state.vector_store, chunks, video_id)
-
         st.success("✅ Video processed successfully!")
 
         return {
             "video_id": video_id,
-            "transcript": transcript,
-            "chunks": chunks,
+            "transcript_chars": len(transcript),
             "chunk_count": len(chunks),
         }
 
     except Exception as e:
         st.error(f"❌ Error processing video: {str(e)}")
+        if video_id and ingest_state(services["data"], video_id) == "partial":
+            st.info("↻ Progress was saved; process the video again to resume")
         return None
 
 
-def answer_question(question, video_id):
-    """Answer a question based on the video transcript."""
+def assistant_html(content):
+    """Render an assistant chat bubble."""
+    return f"""
+            <div class="chat-message assistant-message">
+                <strong>🤖 Assistant:</strong><br>{content}
+            </div>
+            """
+
+
+def answer_question(question, video_ids, placeholder):
+    """Answer a question about one or more videos, streaming into placeholder."""
     try:
-        with st.spinner("🔍 Searching for relevant information..."):
-            results = search_similar(
-                st.session_state.vector_store, question, video_id, k=SEARCH_K
-            )
+        if len(video_ids) == 1:
+            scope = video_ids[0]
+        else:
+            scope = collection_key(video_ids)
+
+        # Exact repeats and keyword queries need no query embedding
+        cached = services["answer_cache"].get(scope, question)
+        embedding = None
+        results = None
+        if cached is None:
+            results = keyword_search(question, video_ids, k=SEARCH_K)
+        if cached is None and results is None:
+            # Serve near-duplicate questions from the shared cache
+            embedding = services["vector_store"].embeddings.embed_query(question)
+            cached = services["answer_cache"].get(scope, question, embedding)
+        if cached is not None:
+            placeholder.markdown(assistant_html(cached), unsafe_allow_html=True)
+            return cached, [], {"cached": True}
+
+        if results is None:
+            with st.spinner("🔍 Searching for relevant information..."):
+                results = retrieve(
+                    services["vector_store"],
+                    question,
+                    video_ids,
+                    k=SEARCH_K,
+                    query_vector=embedding,
+                )
 
+        timings = {}
+        answer = ""
         with st.spinner("🤖 Generating answer..."):
-            answer = query_llm(st.session_state.llm, question, results)
+            for token in stream_llm(services["llm"], question, results, timings):
+                answer += token
+                placeholder.markdown(
+                    assistant_html(answer + "▌"), unsafe_allow_html=True
+                )
+        placeholder.markdown(assistant_html(answer), unsafe_allow_html=True)
+        services["answer_cache"].put(scope, question, embedding, answer)
 
-        return answer, results
+        return answer, results, timings
 
     except Exception as e:
         st.error(f"❌ Error answering question: {str(e)}")
-        return None, None
+        return None, None, None
+
+
+def summarize_video(video_id):
+    """Summarize a processed video with map-reduce over its cached chunks."""
+    try:
+        chunks = get_transcript(services["data"], video_id)
+        if chunks is None:
+            st.error("❌ Process the video before summarizing it")
+            return None
+        summarizer = Summarizer(services["llm"], cache=services["summary_cache"])
+        with st.spinner(f"📝 Summarizing {len(chunks)} chunks..."):
+            return summarizer.summarize(chunks, get_timings(services["data"], video_id))
+    except Exception as e:
+        st.error(f"❌ Error summarizing video: {str(e)}")
+        return None
 
 
 # Initialize session state variables
@@ -238,11 +355,15 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "current_video" not in st.session_state:
     st.session_state.current_video = None
+if "current_collection" not in st.session_state:
+    st.session_state.current_collection = None
 if "video_info" not in st.session_state:
     st.session_state.video_info = None
+if "last_trace" not in st.session_state:
+    st.session_state.last_trace = []
 
 # Initialize services
-initialize_services()
+services = initialize_services()
 
 # Sidebar
 with st.sidebar:
@@ -262,9 +383,12 @@ with st.sidebar:
     with col1:
         if st.button("▶️ Process Video", use_container_width=True, type="primary"):
             if youtube_url:
-                video_info = process_video(youtube_url)
+                with trace() as spans:
+                    video_info = process_video(youtube_url)
+                st.session_state.last_trace = spans
                 if video_info:
                     st.session_state.current_video = video_info["video_id"]
+                    st.session_state.current_collection = None
                     st.session_state.video_info = video_info
                     st.session_state.messages = []  # Clear chat history
             else:
@@ -283,12 +407,98 @@ with st.sidebar:
         st.info(f"**Video ID:** {st.session_state.current_video}")
         st.metric(
             "Transcript Length",
-            f"{len(st.session_state.video_info['transcript'])} chars",
+            f"{st.session_state.video_info['transcript_chars']} chars",
         )
         st.metric("Chunks", st.session_state.video_info["chunk_count"])
 
+    # Embedding cache counters
+    cache_stats = services["vector_store"].embeddings.stats()
+    st.caption(
+        f"🧠 Embedding cache: {cache_stats['hits']} hits / "
+        f"{cache_stats['misses']} misses ({cache_stats['size']} vectors stored)"
+    )
+
     st.markdown("---")
 
+    # Collections of videos to question together
+    st.subheader("📚 Collections")
+    with st.expander("➕ New Collection"):
+        collection_name = st.text_input("Collection name:", key="collection_name")
+        collection_videos = st.multiselect(
+            "Videos:",
+            services["data"].video_ids(),
+            help="Only processed videos can be added",
+        )
+        if st.button("💾 Save Collection", use_container_width=True):
+            if collection_name and collection_videos:
+                services["data"].put_collection(collection_name, collection_videos)
+                st.success(f"✅ Saved {collection_name}")
+            else:
+                st.warning("⚠️ Enter a name and pick at least one video")
+
+    collection_names = services["data"].collection_names()
+    if collection_names:
+        chosen = st.selectbox("Ask across a collection:", collection_names)
+        if st.button("📚 Use Collection", use_container_width=True):
+            st.session_state.current_collection = chosen
+            st.session_state.current_video = None
+            st.session_state.video_info = None
+            st.session_state.messages = []
+            st.rerun()
+
+    st.markdown("---")
+
+    # Ingestion progress of every known video
+    with st.expander("📦 Ingestion Status"):
+        states = ingest_states(services["data"])
+        if states:
+            icons = {"complete": "✅", "partial": "🟡", "pending": "⏳"}
+            for state_video_id, state in states.items():
+                st.markdown(f"{icons[state]} `{state_video_id}` — {state}")
+        else:
+            st.caption("No videos yet.")
+
+    # Per-stage latency breakdown
+    with st.expander("⏱️ Performance"):
+        if st.session_state.last_trace:
+            st.markdown("**Last request**")
+            st.table(
+                [
+                    {
+                        "stage": record["name"],
+                        "ms": round(record["ms"], 1),
+                        "details": ", ".join(
+                            f"{key}={value}"
+                            for key, value in record.items()
+                            if key not in ("name", "ms")
+                        ),
+                    }
+                    for record in st.session_state.last_trace
+                ]
+            )
+        percentiles = rolling_percentiles()
+        if percentiles:
+            st.markdown("**Rolling latency**")
+            st.table(
+                [
+                    {
+                        "stage": name,
+                        "count": stats["count"],
+                        "p50 ms": round(stats["p50_ms"], 1),
+                        "p95 ms": round(stats["p95_ms"], 1),
+                    }
+                    for name, stats in sorted(percentiles.items())
+                ]
+            )
+            st.download_button(
+                "Download Prometheus metrics",
+                prometheus_text(),
+                file_name="metrics.prom",
+                mime="text/plain",
+            )
+        else:
+            st.caption("No requests yet.")
+
     # Instructions
     with st.expander("ℹ️ How to Use"):
         st.markdown("""
@@ -303,8 +513,23 @@ with st.sidebar:
 # Main content area
 st.title("💬 Ask Questions About Your Video")
 
+# Videos the questions are about
+if st.session_state.current_collection:
+    active_videos = (
+        services["data"].get_collection(st.session_state.current_collection) or []
+    )
+    active_label = (
+        f"📚 Current Collection: {st.session_state.current_collection} "
+        f"({len(active_videos)} videos)"
+    )
+elif st.session_state.current_video:
+    active_videos = [st.session_state.current_video]
+    active_label = f"📹 Current Video: {st.session_state.current_video}"
+else:
+    active_videos = []
+
 # Show instructions if no video is loaded
-if not st.session_state.current_video:
+if not active_videos:
     st.info(
         "👈 Start by entering a YouTube URL in the sidebar and clicking 'Process Video'"
     )
@@ -314,7 +539,7 @@ else:
         st.markdown(
             f"""
         <div class="video-info">
-            <h4>📹 Current Video: {st.session_state.current_video}</h4>
+            <h4>{active_label}</h4>
             <p>Ask any questions about the video content below!</p>
         </div>
         """,
@@ -333,14 +558,22 @@ else:
                 unsafe_allow_html=True,
             )
         else:
-            st.markdown(
-                f"""
-            <div class="chat-message assistant-message">
-                <strong>🤖 Assistant:</strong><br>{message["content"]}
-            </div>
-            """,
-                unsafe_allow_html=True,
-            )
+            st.markdown(assistant_html(message["content"]), unsafe_allow_html=True)
+            if message.get("cached"):
+                st.caption("⚡ Served from the answer cache")
+            elif "rounds" in message:
+                st.caption(
+                    f"📝 Summary in rounds of "
+                    f"{' → '.join(map(str, message['rounds']))} parts · "
+                    f"{message['llm_calls']} LLM calls · "
+                    f"{message['cache_hits']} partial summaries reused"
+                )
+            elif "first_token" in message:
+                st.caption(
+                    f"⚡ First token in {message['first_token']:.2f}s · "
+                    f"{message['total']:.2f}s total · "
+                    f"{message['sources']} chunks used"
+                )
 
     # Question input
     st.markdown("---")
@@ -360,23 +593,50 @@ else:
         if st.button("🔄 New Question", use_container_width=True):
             st.rerun()
 
+    with col3:
+        summarize_button = len(active_videos) == 1 and st.button(
+            "📝 Summarize Video", help="Timestamped summary of the whole video"
+        )
+
+    if summarize_button:
+        with trace() as spans:
+            result = summarize_video(active_videos[0])
+        st.session_state.last_trace = spans
+        if result:
+            st.session_state.messages.append(
+                {"role": "user", "content": "📝 Summarize this video"}
+            )
+            st.session_state.messages.append(
+                {
+                    "role": "assistant",
+                    "content": result.pop("summary"),
+                    **result,
+                }
+            )
+            st.rerun()
+
     # Handle question submission
     if ask_button and question:
         # Add user message to chat
         st.session_state.messages.append({"role": "user", "content": question})
 
-        # Get answer
-        answer, sources = answer_question(question, st.session_state.current_video)
+        # Get answer, streamed in place below the question
+        with trace() as spans:
+            answer, sources, timings = answer_question(
+                question, active_videos, st.empty()
+            )
+        st.session_state.last_trace = spans
 
         if answer:
-            # Add assistant message to chat
-            st.session_state.messages.append({"role": "assistant", "content": answer})
-
-            # Show source count
-            if sources:
-                st.caption(
-                    f"📚 Answer based on {len(sources)} relevant chunks from the transcript"
-                )
+            # Add assistant message to chat, with timing and source count
+            st.session_state.messages.append(
+                {
+                    "role": "assistant",
+                    "content": answer,
+                    "sources": len(sources),
+                    **timings,
+                }
+            )
 
             st.rerun()
 
@@ -391,3 +651,5 @@ st.markdown(
     "</div>",
     unsafe_allow_html=True,
 )
+
+observe("rerun", (time.perf_counter() - _rerun_start) * 1000)
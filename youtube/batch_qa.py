@@ -0,0 +1,268 @@
+"""
+Batch question answering over already ingested videos.
+
+Usage:
+    python batch_qa.py questions.jsonl --output answers.jsonl
+    cat questions.jsonl | python batch_qa.py --concurrency 16
+
+Each input line is a JSON object with "video" (URL or video ID; "video_id"
+also works), "question" and an optional "id". All questions are embedded up
+front in one batched request, then retrieval and the LLM call run for many
+questions at once, at most --concurrency at a time. Every output line holds
+the answer, its sources and per-stage latencies, in input order.
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from transcript import extract_video_id
+from data_manager import load_data, get_transcript
+from pinecone_manager import initialize_vector_store
+from llm_handler import initialize_llm, query_llm
+from answer_cache import AnswerCache
+from retrieval import retrieve
+from lexical_index import get_lexical_index
+from config import BATCH_QA_CONCURRENCY, SEARCH_K
+
+
+def read_items(lines):
+    """
+    Parse question items from JSON lines, skipping blank lines.
+
+    Raises:
+        ValueError: If a line is not a JSON object with a video and a question
+    """
+    items = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {number}: invalid JSON ({e})") from e
+        video = record.get("video") or record.get("video_id")
+        question = record.get("question")
+        if not video or not question:
+            raise ValueError(f"line {number}: needs a video and a question")
+        items.append(
+            {
+                "id": record.get("id", len(items)),
+                "video_id": extract_video_id(video),
+                "question": question,
+            }
+        )
+    return items
+
+
+def _sources(documents):
+    """Describe retrieved chunks by video, position and time range."""
+    return [
+        {
+            "video_id": doc.metadata.get("source_video"),
+            "chunk": doc.metadata.get("chunk"),
+            "start": doc.metadata.get("start"),
+            "end": doc.metadata.get("end"),
+        }
+        for doc in documents
+    ]
+
+
+def answer_item(item, embedding, vector_store, llm, answer_cache=None):
+    """
+    Answer one question whose query embedding is already computed.
+
+    Returns:
+        Result dict with the answer, sources and latencies in milliseconds
+    """
+    start = time.perf_counter()
+    result = {**item, "answer": None, "sources": [], "cached": False}
+    if answer_cache is not None:
+        cached = answer_cache.get(item["video_id"], item["question"], embedding)
+        if cached is not None:
+            result.update(answer=cached, cached=True)
+            result["latency_ms"] = {"total": (time.perf_counter() - start) * 1000}
+            return result
+
+    documents = retrieve(
+        vector_store,
+        item["question"],
+        [item["video_id"]],
+        k=SEARCH_K,
+        query_vector=embedding,
+    )
+    retrieved = time.perf_counter()
+    answer = query_llm(llm, item["question"], documents)
+    finished = time.perf_counter()
+    if answer_cache is not None:
+        answer_cache.put(item["video_id"], item["question"], embedding, answer)
+
+    result.update(answer=answer, sources=_sources(documents))
+    result["latency_ms"] = {
+        "retrieve": (retrieved - start) * 1000,
+        "llm": (finished - retrieved) * 1000,
+        "total": (finished - start) * 1000,
+    }
+    return result
+
+
+def answer_all(
+    items, data, vector_store, llm, answer_cache=None, concurrency=BATCH_QA_CONCURRENCY
+):
+    """
+    Embed all questions in one batch, then answer them concurrently.
+
+    Returns:
+        Tuple of (results in input order, summary dict)
+    """
+    start = time.perf_counter()
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        if get_transcript(data, item["video_id"]) is None:
+            results[index] = {
+                **item,
+                "error": "video not ingested; run ingest.py for it first",
+            }
+        else:
+            pending.append(index)
+
+    embed_start = time.perf_counter()
+    embeddings = vector_store.embeddings.embed_queries(
+        [items[index]["question"] for index in pending]
+    )
+    embed_ms = (time.perf_counter() - embed_start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(
+                answer_item,
+                items[index],
+                embedding,
+                vector_store,
+                llm,
+                answer_cache,
+            ): index
+            for index, embedding in zip(pending, embeddings)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = {**items[index], "error": str(e)}
+                print(
+                    f"[{done}/{len(pending)}] ✗ {items[index]['id']}: {e}",
+                    file=sys.stderr,
+                )
+                continue
+            print(
+                f"[{done}/{len(pending)}] ✓ {items[index]['id']} "
+                f"({results[index]['latency_ms']['total']:.0f}ms)",
+                file=sys.stderr,
+            )
+
+    elapsed = time.perf_counter() - start
+    latencies = sorted(
+        result["latency_ms"]["total"] for result in results if "latency_ms" in result
+    )
+    summary = {
+        "items": len(items),
+        "failed": sum("error" in result for result in results),
+        "cached": sum(result.get("cached", False) for result in results),
+        "seconds": elapsed,
+        "questions_per_second": len(items) / elapsed if elapsed else 0.0,
+        "embed_ms": embed_ms,
+        "p50_ms": _percentile(latencies, 0.5),
+        "p95_ms": _percentile(latencies, 0.95),
+    }
+    return results, summary
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def print_summary(summary):
+    """Print throughput and latency for a batch run to stderr."""
+    print("-" * 50, file=sys.stderr)
+    print(
+        f"Answered {summary['items'] - summary['failed']}/{summary['items']} "
+        f"questions ({summary['cached']} from the answer cache) "
+        f"in {summary['seconds']:.1f}s",
+        file=sys.stderr,
+    )
+    print(
+        f"Throughput: {summary['questions_per_second']:.1f} questions/s, "
+        f"query embedding {summary['embed_ms']:.0f}ms for the batch, "
+        f"latency p50 {summary['p50_ms']:.0f}ms / p95 {summary['p95_ms']:.0f}ms",
+        file=sys.stderr,
+    )
+
+
+def main():
+    """Batch question answering flow."""
+    parser = argparse.ArgumentParser(description="Answer many questions at once.")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        help="JSONL file of {video, question[, id]} objects (default: stdin)",
+    )
+    parser.add_argument("--output", help="Results JSONL path (default: stdout)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_QA_CONCURRENCY,
+        help="LLM calls in flight at once",
+    )
+    parser.add_argument(
+        "--no-answer-cache",
+        action="store_true",
+        help="Always call the LLM instead of reusing cached answers",
+    )
+    args = parser.parse_args()
+
+    try:
+        if args.input:
+            with open(args.input, "r") as f:
+                items = read_items(f)
+        else:
+            items = read_items(sys.stdin)
+    except ValueError as e:
+        parser.error(str(e))
+    if not items:
+        print("No questions to answer.", file=sys.stderr)
+        return
+
+    print(f"Initializing services for {len(items)} questions...", file=sys.stderr)
+    vector_store = initialize_vector_store()
+    llm = initialize_llm()
+    answer_cache = None if args.no_answer_cache else AnswerCache()
+    data = load_data()
+    # The BM25 index reads transcripts from the same store
+    get_lexical_index(data)
+
+    results, summary = answer_all(
+        items, data, vector_store, llm, answer_cache, concurrency=args.concurrency
+    )
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+    print_summary(summary)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
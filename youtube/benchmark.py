@@ -0,0 +1,364 @@
+"""
+Offline benchmark for the transcript Q&A pipeline.
+
+Runs every stage against deterministic local fakes (transcript source,
+embeddings, vector store and LLM), so results are reproducible without
+YouTube, Gemini or Pinecone access.
+
+Usage:
+    python benchmark.py --sizes 1,10,100,1000,10000 --output baseline.json
+    python benchmark.py --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from transcript import cleanData
+from chunking import splitText, splitTranscript
+from data_manager import load_data, save_data, add_transcript, get_transcript
+from pinecone_manager import search_similar
+from local_store import LocalVectorStore
+from pipeline import stream_upload, cached_chunk_stream
+from llm_handler import query_llm
+from retrieval import mmr
+from config import RERANK_FETCH_K, RERANK_K
+
+_VOCABULARY = (
+    "the speaker explains how attention memory habits focus learning practice "
+    "research people brain time money work study results example story simple "
+    "idea change first second third reason effect system model data question"
+).split()
+
+
+class FakeSnippet:
+    """Transcript snippet shaped like youtube_transcript_api's FetchedTranscriptSnippet."""
+
+    __slots__ = ("text", "start", "duration")
+
+    def __init__(self, text, start, duration):
+        self.text = text
+        self.start = start
+        self.duration = duration
+
+
+class FakeTranscriptSource:
+    """Deterministic synthetic transcripts of a configurable length."""
+
+    def __init__(self, snippets_per_video=200, words_per_snippet=10):
+        self.snippets_per_video = snippets_per_video
+        self.words_per_snippet = words_per_snippet
+
+    def fetch(self, video_id):
+        rng = random.Random(video_id)
+        return [
+            FakeSnippet(
+                " ".join(rng.choices(_VOCABULARY, k=self.words_per_snippet)),
+                i * 3.0,
+                3.0,
+            )
+            for i in range(self.snippets_per_video)
+        ]
+
+
+class FakeEmbeddings:
+    """Hashed bag-of-words embeddings with a configurable per-call latency."""
+
+    def __init__(self, dim=64, latency=0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.split():
+            vector[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+
+class MemoryVectorStore(LocalVectorStore):
+    """LocalVectorStore that keeps its partitions in memory instead of on disk."""
+
+    def __init__(self, embedding):
+        self.embeddings = embedding
+        self._lock = threading.Lock()
+        self._partitions = {}
+        self._writers = {}
+
+    def _load(self, video_id):
+        with self._lock:
+            return self._partitions.get(video_id)
+
+    def _write(self, video_id, vectors, docs):
+        with self._lock:
+            self._partitions[video_id] = (vectors, docs)
+
+    def video_ids(self):
+        with self._lock:
+            return list(self._partitions)
+
+    def candidates(self, query, video_id, k):
+        """Return (query vector, matrix of the k nearest chunk vectors)."""
+        vectors, _ = self._load(video_id)
+        query = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        best = np.argsort(-(vectors @ query))[:k]
+        return query, vectors[best]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_stage(fn, items, measure_memory=True, reset=None):
+    """
+    Call fn on every item and summarize latency, throughput and memory.
+
+    Latencies come from a pass without tracemalloc; peak memory from a
+    second pass with it, since tracing slows allocation-heavy code. Stages
+    that change state pass a reset callable, run before the second pass so
+    it repeats the first pass's work instead of a no-op.
+    """
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        call_start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - call_start)
+    seconds = time.perf_counter() - start
+
+    result = {
+        "calls": len(items),
+        "seconds": seconds,
+        "per_second": len(items) / seconds if seconds else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+    if measure_memory:
+        if reset is not None:
+            reset()
+        tracemalloc.start()
+        for item in items:
+            fn(item)
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    return result
+
+
+def benchmark_corpus(size, args, workdir):
+    """Run every pipeline stage over a synthetic corpus of `size` videos."""
+    source = FakeTranscriptSource(args.snippets, args.words)
+    video_ids = [f"video{i:05d}" for i in range(size)]
+    snippets = {video_id: source.fetch(video_id) for video_id in video_ids}
+    texts = {}
+    chunks = {}
+    timings = {}
+    results = {}
+
+    def clean(video_id):
+        texts[video_id] = cleanData(snippets[video_id])
+
+    def split_text(video_id):
+        splitText(texts[video_id])
+
+    def split_transcript(video_id):
+        chunks[video_id], timings[video_id] = splitTranscript(snippets[video_id])
+
+    results["cleanData"] = run_stage(clean, video_ids, args.memory)
+    results["splitText"] = run_stage(split_text, video_ids, args.memory)
+    results["splitTranscript"] = run_stage(split_transcript, video_ids, args.memory)
+
+    db_path = os.path.join(workdir, f"transcripts_{size}.sqlite3")
+    no_legacy = os.path.join(workdir, "missing.json")
+    store = load_data(db_path, no_legacy)
+    target = {"store": store}
+
+    def save(video_id):
+        add_transcript(target["store"], video_id, chunks[video_id], timings[video_id])
+        save_data(target["store"])
+
+    def fresh_store():
+        path = os.path.join(workdir, f"transcripts_{size}_memory.sqlite3")
+        target["store"] = load_data(path, no_legacy)
+
+    results["save_data"] = run_stage(save, video_ids, args.memory, fresh_store)
+    results["load_data"] = run_stage(
+        lambda _: load_data(db_path, no_legacy), range(args.loads), args.memory
+    )
+    results["get_transcript"] = run_stage(
+        lambda video_id: get_transcript(store, video_id), video_ids, args.memory
+    )
+
+    embeddings = FakeEmbeddings(latency=args.embed_latency)
+    vector_store = MemoryVectorStore(embeddings)
+    target["vector_store"] = vector_store
+
+    def upload(video_id):
+        # Silence the per-video upload message
+        with contextlib.redirect_stdout(io.StringIO()):
+            stream_upload(
+                target["vector_store"],
+                video_id,
+                cached_chunk_stream(chunks[video_id], timings[video_id]),
+            )
+
+    def fresh_vector_store():
+        target["vector_store"] = MemoryVectorStore(embeddings)
+
+    results["stream_upload"] = run_stage(
+        upload, video_ids, args.memory, fresh_vector_store
+    )
+
+    rng = random.Random(size)
+    queries = [
+        (rng.choice(video_ids), " ".join(rng.choices(_VOCABULARY, k=6)))
+        for _ in range(args.queries)
+    ]
+    retrieved = {}
+
+    def search(query):
+        retrieved[query] = search_similar(vector_store, query[1], query[0], k=10)
+
+    results["search_similar"] = run_stage(search, queries, args.memory)
+
+    candidates = {
+        query: vector_store.candidates(query[1], query[0], RERANK_FETCH_K)
+        for query in queries
+    }
+    results["rerank_mmr"] = run_stage(
+        lambda query: mmr(*candidates[query], RERANK_K), queries, args.memory
+    )
+
+    llm = FakeListChatModel(responses=["A fake answer."], sleep=args.llm_latency)
+    results["query_llm"] = run_stage(
+        lambda query: query_llm(llm, query[1], retrieved[query]),
+        queries,
+        args.memory,
+    )
+
+    for result in results.values():
+        result["videos"] = size
+    results["corpus"] = {
+        "videos": size,
+        "chunks": sum(len(video_chunks) for video_chunks in chunks.values()),
+        "characters": sum(len(text) for text in texts.values()),
+    }
+    return results
+
+
+def print_results(size, results):
+    """Print one corpus size's stage metrics as a table."""
+    corpus = results["corpus"]
+    print(
+        f"\n=== {corpus['videos']} videos, {corpus['chunks']} chunks, "
+        f"{corpus['characters']} chars ==="
+    )
+    print(
+        f"{'stage':<20}{'calls':>8}{'calls/s':>12}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}"
+    )
+    for stage, metrics in results.items():
+        if stage == "corpus":
+            continue
+        peak = f"{metrics['peak_mb']:.2f}" if "peak_mb" in metrics else "-"
+        print(
+            f"{stage:<20}{metrics['calls']:>8}{metrics['per_second']:>12.1f}"
+            f"{metrics['p50_ms']:>10.3f}{metrics['p95_ms']:>10.3f}"
+            f"{metrics['p99_ms']:>10.3f}{peak:>10}"
+        )
+
+
+def compare(baseline, current, threshold):
+    """Print stages whose p50 latency regressed by more than `threshold`."""
+    regressions = 0
+    for size, stages in current.items():
+        for stage, metrics in stages.items():
+            old = baseline.get(size, {}).get(stage)
+            if stage == "corpus" or not old or not old["p50_ms"]:
+                continue
+            ratio = metrics["p50_ms"] / old["p50_ms"]
+            if ratio > 1 + threshold:
+                regressions += 1
+                print(
+                    f"REGRESSION {size} videos / {stage}: "
+                    f"p50 {old['p50_ms']:.3f} -> {metrics['p50_ms']:.3f} ms "
+                    f"({ratio:.2f}x)"
+                )
+    if not regressions:
+        print("No regressions against the baseline.")
+    return regressions
+
+
+def main():
+    """Benchmark flow."""
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark.")
+    parser.add_argument("--sizes", default="1,10,100,1000,10000")
+    parser.add_argument("--snippets", type=int, default=200, help="Per video")
+    parser.add_argument("--words", type=int, default=10, help="Per snippet")
+    parser.add_argument("--queries", type=int, default=100, help="Per corpus")
+    parser.add_argument("--loads", type=int, default=10, help="load_data calls")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="Skip the tracemalloc pass",
+    )
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed p50 slowdown"
+    )
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    current = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            current[str(size)] = benchmark_corpus(size, args, workdir)
+            print_results(size, current[str(size)])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": current}, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)["results"]
+        print()
+        if compare(baseline, current, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,23 @@
 Text chunking module for splitting transcripts.
 """
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import time
+from functools import lru_cache
+from metrics import span, observe
 from config import CHUNK_SIZE, CHUNK_OVERLAP
 
 
+@lru_cache(maxsize=None)
+def _text_splitter():
+    """Create the shared splitter on first use; splitters are stateless."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+    )
+
+
 def splitText(text):
     """
     Split text into chunks for embedding.
@@ -16,10 +29,93 @@ def splitText(text):
     Returns:
         List of text chunks
     """
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-    )
-    chunks = text_splitter.split_text(text)
+    with span("split", chars=len(text)) as record:
+        chunks = _text_splitter().split_text(text)
+        record["chunks"] = len(chunks)
 
     return chunks
+
+
+def splitTranscript(snippets):
+    """
+    Split timed transcript snippets into chunks in a single pass.
+
+    Snippets are packed whole into chunks of up to CHUNK_SIZE characters, and
+    each new chunk starts with the trailing snippets of the previous one, up to
+    CHUNK_OVERLAP characters. Because chunk boundaries fall between snippets,
+    every chunk knows exactly when it starts and ends in the video.
+
+    Args:
+        snippets: FetchedTranscript or other iterable of snippets with
+            text, start and duration
+
+    Returns:
+        Tuple of (chunks, timings), where timings[i] is the
+        [start, end] seconds of chunks[i]
+    """
+    with span("split") as record:
+        chunks = []
+        timings = []
+        for chunk, timing in _iterChunks(snippets):
+            chunks.append(chunk)
+            timings.append(timing)
+        record["chunks"] = len(chunks)
+        record["chars"] = sum(len(chunk) for chunk in chunks)
+    return chunks, timings
+
+
+def iterTranscriptChunks(snippets):
+    """
+    Yield (chunk, [start, end]) pairs as snippets are consumed.
+
+    Streaming consumers can embed early chunks before later snippets are even
+    read. A "split" span is recorded when the stream ends, timing only the
+    work done inside the generator, not the consumer's work between chunks.
+    """
+    busy = 0.0
+    chunks = 0
+    chars = 0
+    resumed = time.perf_counter()
+    try:
+        for chunk, timing in _iterChunks(snippets):
+            busy += time.perf_counter() - resumed
+            chunks += 1
+            chars += len(chunk)
+            yield chunk, timing
+            resumed = time.perf_counter()
+        busy += time.perf_counter() - resumed
+    finally:
+        observe("split", busy * 1000, chunks=chunks, chars=chars)
+
+
+def _iterChunks(snippets):
+    """Split snippets into (chunk, [start, end]) pairs; see splitTranscript."""
+    window = []  # (text, start, end) of snippets in the current chunk
+    size = 0
+    fresh = False  # Whether the window holds text not yet emitted
+
+    for snippet in snippets:
+        text = " ".join(snippet.text.split())
+        if not text:
+            continue
+
+        if fresh and size + len(text) > CHUNK_SIZE:
+            yield _emit(window)
+            fresh = False
+            # Carry the trailing snippets over as overlap
+            drop = 0
+            while drop < len(window) and size > CHUNK_OVERLAP:
+                size -= len(window[drop][0]) + 1
+                drop += 1
+            del window[:drop]
+
+        window.append((text, snippet.start, snippet.start + snippet.duration))
+        size += len(text) + 1
+        fresh = True
+
+    if fresh:
+        yield _emit(window)
+
+
+def _emit(window):
+    return " ".join(text for text, _, _ in window), [window[0][1], window[-1][2]]
@@ -15,12 +15,32 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")  # If you use a separate env var
 
 # File Paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_FILE_PATH = os.path.join(SCRIPT_DIR, "data.json")
+DATA_FILE_PATH = os.path.join(SCRIPT_DIR, "data.json")  # Legacy cache, migrated once
+TRANSCRIPT_DB_PATH = os.path.join(SCRIPT_DIR, "transcripts.sqlite3")
+LOCAL_STORE_DIR = os.path.join(SCRIPT_DIR, "vector_store")
+ANSWER_CACHE_PATH = os.path.join(SCRIPT_DIR, "answer_cache.sqlite3")
+EMBEDDING_CACHE_PATH = os.path.join(SCRIPT_DIR, "embedding_cache.sqlite3")
+FETCH_CACHE_PATH = os.path.join(SCRIPT_DIR, "fetch_cache.sqlite3")
+SUMMARY_CACHE_PATH = os.path.join(SCRIPT_DIR, "summary_cache.sqlite3")
 
 # Model Configuration
 EMBEDDING_MODEL = "models/text-embedding-004"
 LLM_MODEL = "gemini-2.5-flash"
 
+# Embedding Cache Configuration
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000  # Least recently used vectors are evicted
+
+# Transcript Fetch Configuration
+TRANSCRIPT_LANGUAGES = ["en", "hi"]  # Preferred caption languages, in order
+FETCH_CACHE_TTL = 7 * 24 * 3600  # Seconds a fetched transcript is reused
+FETCH_NEGATIVE_TTL = 3600  # Seconds a "no transcript"/"disabled" result is reused
+FETCH_POOL_SIZE = 8  # Pooled HTTP connections to YouTube
+PREFETCH_WORKERS = 4  # Background transcript prefetches at once
+
+# Vector Store Configuration
+# "pinecone" for the hosted index, "local" for on-disk NumPy partitions
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+
 # Pinecone Configuration
 PINECONE_INDEX_NAME = "chatbot"
 
@@ -30,3 +50,47 @@ CHUNK_OVERLAP = 200
 
 # Search Configuration
 SEARCH_K = 10  # Number of similar documents to retrieve
+
+# Two-Stage Retrieval Configuration
+# "two_stage" reranks a wide candidate set locally; "hybrid" fuses the top SEARCH_K
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "two_stage")
+RERANK_FETCH_K = 50  # Candidates fetched with their embeddings in stage one
+RERANK_K = 4  # Chunks kept for the prompt after reranking
+RERANK_METHOD = "mmr"  # Name of a reranker registered in retrieval.RERANKERS
+MMR_LAMBDA = 0.7  # 1.0 ranks purely by relevance, 0.0 purely by diversity
+
+# Hybrid Search Configuration
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # Reciprocal rank fusion damping constant
+
+# Prompt Context Configuration
+CONTEXT_TOKEN_BUDGET = 2000  # Max estimated tokens of transcript in the prompt
+CHARS_PER_TOKEN = 4  # Rough characters-per-token ratio for estimates
+
+# Answer Cache Configuration
+ANSWER_CACHE_SIMILARITY = 0.95  # Cosine similarity to reuse a near-duplicate answer
+ANSWER_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached answer expires
+ANSWER_CACHE_MAX_ENTRIES = 10_000  # Least recently used answers are evicted
+
+# Streaming Ingestion Configuration
+EMBED_BATCH_SIZE = 32  # Chunks per embedding request and upsert
+PIPELINE_QUEUE_SIZE = 4  # Embedded batches waiting for upsert before embedding pauses
+
+# Bulk Ingestion Configuration
+INGEST_WORKERS = 8  # Videos processed at once
+INGEST_FETCH_CONCURRENCY = 4  # Parallel YouTube transcript requests
+INGEST_UPLOAD_CONCURRENCY = 2  # Parallel embedding + upsert calls
+
+# Batch Question Answering Configuration
+BATCH_QA_CONCURRENCY = 8  # LLM calls in flight at once
+
+# Summarization Configuration
+SUMMARY_GROUP_CHARS = 12_000  # Transcript characters summarized per map call
+SUMMARY_FANIN = 4  # Partial summaries merged per reduce call
+SUMMARY_WORKERS = 8  # Summarization LLM calls in flight at once
+SUMMARY_CACHE_MAX_ENTRIES = 10_000  # Least recently used partial summaries are evicted
+
+# Metrics Configuration
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH")  # Append every span when set
+METRICS_HISTORY = 1000  # Recent durations kept per span for rolling percentiles
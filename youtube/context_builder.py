@@ -0,0 +1,136 @@
+"""
+Context builder module for turning retrieved chunks into prompt context.
+"""
+
+from transcript import format_timestamp
+from config import CHUNK_OVERLAP, CONTEXT_TOKEN_BUDGET, CHARS_PER_TOKEN
+
+
+def estimate_tokens(text):
+    """Roughly estimate the number of tokens in a text."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def merge_text(left, right):
+    """Join two consecutive chunks, dropping the overlap the splitter repeated."""
+    for size in range(min(len(left), len(right), CHUNK_OVERLAP), 0, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left} {right}"
+
+
+def _passages(documents):
+    """
+    Merge retrieved chunks into passages of consecutive transcript text.
+
+    Returns:
+        List of dicts with video ID, first chunk position, text and the best
+        retrieval rank among the merged chunks
+    """
+    seen = set()
+    located = []
+    unlocated = []
+    for rank, doc in enumerate(documents):
+        if doc.page_content in seen:
+            continue
+        seen.add(doc.page_content)
+        video_id = doc.metadata.get("source_video", "")
+        position = doc.metadata.get("chunk")
+        item = {
+            "video": video_id,
+            "rank": rank,
+            "text": doc.page_content,
+            "start": doc.metadata.get("start"),
+            "stop": doc.metadata.get("end"),
+        }
+        if position is None:
+            unlocated.append({**item, "position": None})
+        else:
+            located.append({**item, "position": int(position)})
+
+    located.sort(key=lambda item: (item["video"], item["position"]))
+
+    passages = []
+    for item in located:
+        last = passages[-1] if passages else None
+        if (
+            last is not None
+            and last["video"] == item["video"]
+            and last["end"] + 1 == item["position"]
+        ):
+            last["text"] = merge_text(last["text"], item["text"])
+            last["end"] = item["position"]
+            last["rank"] = min(last["rank"], item["rank"])
+            last["stop"] = item["stop"]
+        else:
+            passages.append({**item, "end": item["position"]})
+
+    # Chunks without a stored position cannot be merged; keep retrieval order
+    passages.extend(unlocated)
+
+    # Drop passages whose text is already contained in another passage
+    return [
+        passage
+        for passage in passages
+        if not any(
+            other is not passage and passage["text"] in other["text"]
+            for other in passages
+        )
+    ]
+
+
+def build_context(documents, token_budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Build prompt context from retrieved documents.
+
+    Adjacent and overlapping chunks from the same video are merged, duplicate
+    text is dropped, and the most relevant passages are kept until the token
+    budget is reached. Kept passages are ordered by transcript position and
+    labelled with their time range when the chunks carry start/end seconds.
+
+    Args:
+        documents: Documents returned by the vector store, most relevant first
+        token_budget: Max estimated tokens of transcript text
+
+    Returns:
+        Context string with one labelled block per passage
+    """
+    passages = _passages(documents)
+
+    kept = []
+    remaining = token_budget
+    for passage in sorted(passages, key=lambda passage: passage["rank"]):
+        tokens = estimate_tokens(passage["text"])
+        if tokens > remaining:
+            if kept:
+                continue
+            # Always keep some text from the most relevant passage
+            passage = {
+                **passage,
+                "text": passage["text"][: remaining * CHARS_PER_TOKEN],
+            }
+            tokens = remaining
+        kept.append(passage)
+        remaining -= tokens
+
+    kept.sort(
+        key=lambda passage: (
+            passage["position"] is None,
+            passage["video"],
+            passage["position"] or 0,
+        )
+    )
+    return "\n\n".join(
+        f"[{_label(passage, i)}]\n{passage['text']}"
+        for i, passage in enumerate(kept, start=1)
+    )
+
+
+def _label(passage, number):
+    """Label a passage with its video and, when known, its time range."""
+    if passage["start"] is None or passage["stop"] is None:
+        return f"Video {passage['video']}, passage {number}"
+    return (
+        f"Video {passage['video']}, "
+        f"{format_timestamp(passage['start'])}-{format_timestamp(passage['stop'])}"
+    )
@@ -1,35 +1,488 @@
 """
-Data manager module for handling JSON persistence of transcript cache.
+Data manager module for persisting the transcript cache.
+
+Transcripts live in an SQLite database keyed by video ID, so lookups do not
+scan the corpus and saving one video does not rewrite the others. The legacy
+data.json cache is imported the first time the database is opened.
+
+Uploads record per-batch checkpoints in the same database, so an ingestion
+that fails partway resumes from the last upserted batch instead of redoing
+the whole video.
+
+Each transcript is stored once as zlib-compressed text plus the [start, end)
+character offsets of its chunks, instead of the overlapping chunk strings.
+Opening the store reads nothing but the schema; a video's text is only
+decompressed when that video is requested.
 """
 
+import hashlib
 import json
-from config import DATA_FILE_PATH
+import sqlite3
+import struct
+import threading
+import zlib
+from array import array
+from metrics import span
+from config import (
+    DATA_FILE_PATH,
+    TRANSCRIPT_DB_PATH,
+    EMBEDDING_MODEL,
+    PINECONE_INDEX_NAME,
+    VECTOR_STORE_BACKEND,
+)
+
+
+class TranscriptStore:
+    """
+    Transcript cache backed by SQLite.
+
+    Entries are dicts shaped like the legacy data.json items
+    ({"videoId": ..., "transcript": [...], "timings": [...], "indexed": ...}),
+    where "timings" holds the [start, end] seconds of each chunk when the
+    transcript was split with its timing and "target" the index_target() the
+    chunks were indexed for. Changes are kept
+    in memory until flush() writes just the modified videos in one atomic
+    transaction. WAL mode lets concurrent Streamlit sessions read while
+    another one writes.
+    """
+
+    def __init__(self, path=TRANSCRIPT_DB_PATH, legacy_path=DATA_FILE_PATH):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "video_id TEXT PRIMARY KEY, transcript TEXT NOT NULL, indexed TEXT, "
+                "timings TEXT)"
+            )
+            columns = [
+                row[1] for row in self._conn.execute("PRAGMA table_info(transcripts)")
+            ]
+            if "timings" not in columns:
+                self._conn.execute("ALTER TABLE transcripts ADD COLUMN timings TEXT")
+            if "target" not in columns:
+                self._conn.execute("ALTER TABLE transcripts ADD COLUMN target TEXT")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS collections ("
+                "name TEXT PRIMARY KEY, video_ids TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS progress ("
+                "video_id TEXT PRIMARY KEY, embedded INTEGER NOT NULL, "
+                "upserted INTEGER NOT NULL, digest TEXT NOT NULL)"
+            )
+        self._migrate_json(legacy_path)
+        self._compress_rows()
+        self._backfill_targets()
+
+    def _migrate_json(self, legacy_path):
+        """Import the legacy data.json cache once, keeping the latest entry per video."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                done = self._conn.execute(
+                    "SELECT 1 FROM meta WHERE key = 'json_migrated'"
+                ).fetchone()
+                if not done:
+                    try:
+                        with open(legacy_path, "r") as f:
+                            items = json.load(f)
+                    except (FileNotFoundError, json.JSONDecodeError):
+                        items = []
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO transcripts (video_id, transcript, indexed) "
+                        "VALUES (?, ?, ?)",
+                        [
+                            (
+                                item["videoId"],
+                                json.dumps(item["transcript"]),
+                                item.get("indexed"),
+                            )
+                            for item in items
+                        ],
+                    )
+                    self._conn.execute(
+                        "INSERT INTO meta (key, value) VALUES ('json_migrated', ?)",
+                        (legacy_path,),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _compress_rows(self):
+        """Repack transcripts still stored as JSON chunk lists, once."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT video_id, transcript FROM transcripts "
+                "WHERE typeof(transcript) = 'text'"
+            ).fetchall()
+            if not rows:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE transcripts SET transcript = ? WHERE video_id = ?",
+                    [
+                        (pack_chunks(json.loads(transcript)), video_id)
+                        for video_id, transcript in rows
+                    ],
+                )
+            # Give the space back to the file system, not just the free list
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _backfill_targets(self):
+        """Record the index target of rows indexed before it was stored."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT video_id, transcript, indexed FROM transcripts "
+                "WHERE indexed IS NOT NULL AND target IS NULL"
+            ).fetchall()
+            target = index_target()
+            matched = [
+                (target, video_id)
+                for video_id, transcript, indexed in rows
+                if indexed == chunks_fingerprint(unpack_chunks(transcript))
+            ]
+            if matched:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE transcripts SET target = ? WHERE video_id = ?", matched
+                    )
+
+    def get(self, video_id):
+        """Return the entry for a video, or None if it is not cached."""
+        with span("cache_read") as record, self._lock:
+            if video_id in self._pending:
+                record["hit"] = True
+                return self._pending[video_id]
+            row = self._conn.execute(
+                "SELECT transcript, indexed, timings, target FROM transcripts "
+                "WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+            record["hit"] = row is not None
+            record["bytes"] = len(row[0]) if row is not None else 0
+        if row is None:
+            return None
+        entry = {"videoId": video_id, "transcript": unpack_chunks(row[0])}
+        if row[1] is not None:
+            entry["indexed"] = row[1]
+        if row[2] is not None:
+            entry["timings"] = json.loads(row[2])
+        if row[3] is not None:
+            entry["target"] = row[3]
+        return entry
+
+    def put(self, entry):
+        """Stage an entry to be written on the next flush()."""
+        with self._lock:
+            self._pending[entry["videoId"]] = entry
+
+    def flush(self):
+        """Write all staged entries in a single transaction."""
+        with span("cache_write") as record, self._lock:
+            record["videos"] = len(self._pending)
+            if not self._pending:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO transcripts "
+                    "(video_id, transcript, indexed, timings, target) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            video_id,
+                            pack_chunks(entry["transcript"]),
+                            entry.get("indexed"),
+                            (
+                                json.dumps(entry["timings"])
+                                if "timings" in entry
+                                else None
+                            ),
+                            entry.get("target"),
+                        )
+                        for video_id, entry in self._pending.items()
+                    ],
+                )
+                # An indexed entry supersedes its upload checkpoint
+                self._conn.executemany(
+                    "DELETE FROM progress WHERE video_id = ?",
+                    [
+                        (video_id,)
+                        for video_id, entry in self._pending.items()
+                        if entry.get("indexed")
+                    ],
+                )
+            self._pending.clear()
+
+    def video_ids(self):
+        """Return the IDs of all cached videos."""
+        with self._lock:
+            rows = self._conn.execute("SELECT video_id FROM transcripts").fetchall()
+            pending = list(self._pending)
+        return list(dict.fromkeys([row[0] for row in rows] + pending))
+
+    def get_progress(self, video_id):
+        """Return the upload checkpoint of a video, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT embedded, upserted, digest FROM progress WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"embedded": row[0], "upserted": row[1], "digest": row[2]}
+
+    def put_progress(self, video_id, embedded, upserted, digest):
+        """Record an upload checkpoint; written immediately so it survives a crash."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO progress (video_id, embedded, upserted, digest) "
+                "VALUES (?, ?, ?, ?)",
+                (video_id, embedded, upserted, digest),
+            )
+
+    def progress_video_ids(self):
+        """Return the IDs of videos with an upload checkpoint."""
+        with self._lock:
+            rows = self._conn.execute("SELECT video_id FROM progress").fetchall()
+        return [row[0] for row in rows]
+
+    def index_states(self, target):
+        """
+        Summarize every video's ingestion state without loading transcripts.
+
+        Args:
+            target: index_target() the videos must be indexed for to count
+                as complete
+
+        Returns:
+            Dict of video ID -> "complete", "partial" or "pending"
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT video_id, MAX(complete), MAX(embedded) FROM ("
+                "SELECT video_id, indexed IS NOT NULL AND target IS ? AS complete, "
+                "0 AS embedded FROM transcripts "
+                "UNION ALL SELECT video_id, 0, embedded FROM progress"
+                ") GROUP BY video_id",
+                (target,),
+            ).fetchall()
+            pending = {
+                video_id: bool(entry.get("indexed")) and entry.get("target") == target
+                for video_id, entry in self._pending.items()
+            }
+        states = {}
+        for video_id, complete, embedded in rows:
+            complete = pending.pop(video_id, complete)
+            states[video_id] = (
+                "complete" if complete else "partial" if embedded else "pending"
+            )
+        for video_id, complete in pending.items():
+            states[video_id] = "complete" if complete else "pending"
+        return states
+
+    def __contains__(self, video_id):
+        return self.get(video_id) is not None
+
+    def get_collection(self, name):
+        """Return the video IDs of a named collection, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_ids FROM collections WHERE name = ?", (name,)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put_collection(self, name, video_ids):
+        """Create or replace a named collection; written immediately."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO collections (name, video_ids) VALUES (?, ?)",
+                (name, json.dumps(list(dict.fromkeys(video_ids)))),
+            )
+
+    def delete_collection(self, name):
+        """Delete a named collection."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM collections WHERE name = ?", (name,))
+
+    def collection_names(self):
+        """Return the names of all collections."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM collections ORDER BY name"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+# Longest chunk overlap pack_chunks() looks for
+_PACK_WINDOW = 8192
+
 
+def pack_chunks(chunks):
+    """
+    Pack chunks as compressed text stored once plus chunk offsets.
 
-def load_data():
-    """Load transcript data from JSON file."""
-    try:
-        with open(DATA_FILE_PATH, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    Each chunk is located in the text built so far: a chunk that starts with
+    the tail of the text (the splitter's overlap) reuses it, anything else is
+    appended. unpack_chunks() always returns the exact input chunks.
+
+    Returns:
+        zlib-compressed bytes: chunk count, [start, end) character offsets as
+        uint32 pairs, then the UTF-8 text
+    """
+    parts = []
+    length = 0
+    tail = ""  # End of the text so far, where an overlap can start
+    offsets = array("I")
+    for chunk in chunks:
+        start = length
+        window = tail[-len(chunk) :] if chunk else ""
+        probe = chunk[:16]
+        position = window.find(probe) if window else -1
+        while position != -1:
+            if chunk.startswith(window[position:]):
+                start = length - len(window) + position
+                break
+            position = window.find(probe, position + 1)
+        new_text = chunk[length - start :]
+        parts.append(new_text)
+        length += len(new_text)
+        tail = (tail + new_text)[-_PACK_WINDOW:]
+        offsets.extend((start, start + len(chunk)))
+    header = struct.pack("<I", len(chunks)) + offsets.tobytes()
+    return zlib.compress(header + "".join(parts).encode("utf-8"))
+
+
+def unpack_chunks(blob):
+    """Rebuild the chunk list from pack_chunks() output (or a legacy JSON list)."""
+    if isinstance(blob, str):
+        return json.loads(blob)
+    raw = zlib.decompress(blob)
+    (count,) = struct.unpack_from("<I", raw)
+    offsets = array("I")
+    offsets.frombytes(raw[4 : 4 + 8 * count])
+    text = raw[4 + 8 * count :].decode("utf-8")
+    return [text[offsets[2 * i] : offsets[2 * i + 1]] for i in range(count)]
+
+
+def load_data(path=TRANSCRIPT_DB_PATH, legacy_path=DATA_FILE_PATH):
+    """Open the transcript store."""
+    return TranscriptStore(path, legacy_path)
 
 
 def save_data(data):
-    """Save transcript data to JSON file."""
-    with open(DATA_FILE_PATH, "w") as f:
-        json.dump(data, f, indent=2)
+    """Persist the videos changed since the last save."""
+    data.flush()
 
 
-def add_transcript(data, video_id, chunks):
-    """Add a new transcript to the data cache."""
-    data.append({"videoId": video_id, "transcript": chunks})
+def add_transcript(data, video_id, chunks, timings=None):
+    """Add a transcript to the data cache, replacing any existing entry."""
+    entry = data.get(video_id)
+    if (
+        entry is not None
+        and entry["transcript"] == chunks
+        and entry.get("timings") == timings
+    ):
+        return data
+    entry = {"videoId": video_id, "transcript": chunks}
+    if timings is not None:
+        entry["timings"] = timings
+    data.put(entry)
     return data
 
 
 def get_transcript(data, video_id):
     """Retrieve a cached transcript by video ID."""
-    for item in data:
-        if item["videoId"] == video_id:
-            return item["transcript"]
-    return None
+    entry = data.get(video_id)
+    if entry is None:
+        return None
+    return entry["transcript"]
+
+
+def get_timings(data, video_id):
+    """Retrieve the [start, end] seconds of each cached chunk, if known."""
+    entry = data.get(video_id)
+    if entry is None:
+        return None
+    return entry.get("timings")
+
+
+def _target_key():
+    return f"{EMBEDDING_MODEL}\0{VECTOR_STORE_BACKEND}\0{PINECONE_INDEX_NAME}"
+
+
+def index_target():
+    """Identify the embedding model and index that uploads currently go to."""
+    return hashlib.sha1(_target_key().encode()).hexdigest()[:16]
+
+
+def fingerprint_hasher():
+    """Return a hash seeded with the embedding model and target index."""
+    return hashlib.sha1(_target_key().encode())
+
+
+def update_fingerprint(digest, chunks):
+    """Feed chunks into a hash from fingerprint_hasher()."""
+    for chunk in chunks:
+        digest.update(b"\0")
+        digest.update(chunk.encode("utf-8"))
+    return digest
+
+
+def chunks_fingerprint(chunks):
+    """Hash the chunks together with the embedding model and target index."""
+    return update_fingerprint(fingerprint_hasher(), chunks).hexdigest()
+
+
+def is_indexed(data, video_id, chunks):
+    """Check whether these exact chunks were already uploaded for the video."""
+    entry = data.get(video_id)
+    if entry is None:
+        return False
+    return entry.get("indexed") == chunks_fingerprint(chunks)
+
+
+def mark_indexed(data, video_id, chunks):
+    """Record that the video's chunks have been uploaded to the vector store."""
+    entry = data.get(video_id)
+    if entry is not None:
+        data.put(
+            {**entry, "indexed": chunks_fingerprint(chunks), "target": index_target()}
+        )
+    return data
+
+
+def ingest_state(data, video_id):
+    """
+    Report how far a video's ingestion got.
+
+    Returns:
+        "complete" if its cached chunks are indexed, "partial" if an upload
+        checkpoint exists, otherwise "pending"
+    """
+    entry = data.get(video_id)
+    if entry is not None and entry.get("indexed") == chunks_fingerprint(
+        entry["transcript"]
+    ):
+        return "complete"
+    progress = data.get_progress(video_id)
+    if progress is not None and progress["embedded"] > 0:
+        return "partial"
+    return "pending"
+
+
+def ingest_states(data):
+    """
+    Return the ingestion state of every cached or partially uploaded video.
+
+    Answered from the stored index targets in one query, without
+    decompressing or hashing any transcript.
+    """
+    return data.index_states(index_target())
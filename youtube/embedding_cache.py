@@ -0,0 +1,142 @@
+"""
+Embedding cache module for persisting embeddings on disk.
+"""
+
+import hashlib
+import inspect
+from array import array
+
+from langchain_core.embeddings import Embeddings
+from lru_store import LRUStore
+from metrics import span
+from config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrap an embeddings model with a content-addressed, size-bounded LRU cache.
+
+    Vectors are keyed by (model name, document/query, text hash), so the same
+    text is only ever embedded once per model. Batch calls look up all cached
+    vectors at once and send only the misses to the wrapped model.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        model_name,
+        path=EMBEDDING_CACHE_PATH,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._cache = LRUStore(path, "embeddings", "vector BLOB", max_entries)
+
+    def _key(self, kind, text):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    def _lookup(self, keys):
+        """Fetch cached vectors for the given keys and refresh their LRU stamp."""
+        found = {}
+        for key, blob in self._cache.get_many(keys).items():
+            vector = array("f")
+            vector.frombytes(blob)
+            found[key] = vector.tolist()
+        return found
+
+    def _store(self, items):
+        """Insert (key, vector) pairs and evict the least recently used overflow."""
+        self._cache.put_many(
+            [(key, array("f", vector).tobytes()) for key, vector in items]
+        )
+
+    def embed_documents(self, texts):
+        """Embed documents, calling the wrapped model only for uncached texts."""
+        with span("embed", texts=len(texts)) as record:
+            keys = [self._key("document", text) for text in texts]
+            cached = self._lookup(list(dict.fromkeys(keys)))
+
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in cached and key not in missing:
+                    missing[key] = text
+
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            record["cache_hits"] = len(keys) - len(missing)
+            record["chars"] = sum(len(text) for text in missing.values())
+
+            if missing:
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+                new_items = list(zip(missing.keys(), vectors))
+                self._store(new_items)
+                cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text):
+        """Embed a query, reusing a cached vector when available."""
+        with span("embed_query", texts=1) as record:
+            key = self._key("query", text)
+            cached = self._lookup([key])
+            if key in cached:
+                self.hits += 1
+                record["cache_hits"] = 1
+                return cached[key]
+
+            self.misses += 1
+            record["cache_hits"] = 0
+            record["chars"] = len(text)
+            vector = self.embeddings.embed_query(text)
+            self._store([(key, vector)])
+        return vector
+
+    def embed_queries(self, texts):
+        """
+        Embed many queries, sending all uncached ones in one batched request.
+
+        Query vectors use the retrieval-query task type, so they are shared
+        with embed_query() in the cache.
+        """
+        with span("embed_query", texts=len(texts)) as record:
+            keys = [self._key("query", text) for text in texts]
+            cached = self._lookup(list(dict.fromkeys(keys)))
+
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in cached and key not in missing:
+                    missing[key] = text
+
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            record["cache_hits"] = len(keys) - len(missing)
+            record["chars"] = sum(len(text) for text in missing.values())
+
+            if missing:
+                queries = list(missing.values())
+                parameters = inspect.signature(self.embeddings.embed_documents)
+                if "task_type" in parameters.parameters:
+                    vectors = self.embeddings.embed_documents(
+                        queries, task_type="RETRIEVAL_QUERY"
+                    )
+                else:
+                    # Models without a query task type embed queries one by one
+                    vectors = [self.embeddings.embed_query(text) for text in queries]
+                new_items = list(zip(missing.keys(), vectors))
+                self._store(new_items)
+                cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+    def stats(self):
+        """Return hit/miss counters and the current number of cached vectors."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": self._cache.size(),
+        }
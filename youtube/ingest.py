@@ -0,0 +1,261 @@
+"""
+Bulk ingestion entry point for indexing many YouTube videos at once.
+
+Usage:
+    python ingest.py videos.txt
+    cat videos.txt | python ingest.py
+    python ingest.py --status [videos.txt]
+
+The input holds one YouTube URL or video ID per line; blank lines and lines
+starting with "#" are ignored. Uploads are checkpointed per batch, so
+rerunning after a failure or crash resumes partially ingested videos.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from transcript import fetchTranscript, extract_video_id
+from transcript_fetcher import get_fetcher
+from chunking import iterTranscriptChunks
+from data_manager import (
+    load_data,
+    save_data,
+    add_transcript,
+    get_transcript,
+    get_timings,
+    is_indexed,
+    mark_indexed,
+    ingest_state,
+    ingest_states,
+)
+from pinecone_manager import initialize_vector_store
+from pipeline import stream_upload, cached_chunk_stream
+from lexical_index import get_lexical_index
+from config import (
+    INGEST_WORKERS,
+    INGEST_FETCH_CONCURRENCY,
+    INGEST_UPLOAD_CONCURRENCY,
+)
+
+
+def read_video_ids(lines):
+    """Parse video IDs from URL/ID lines, dropping blanks, comments and repeats."""
+    video_ids = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            video_ids.append(extract_video_id(line))
+    return list(dict.fromkeys(video_ids))
+
+
+class StageLimits:
+    """Per-stage concurrency limits shared by all ingestion workers."""
+
+    def __init__(self, fetch, upload):
+        self.fetch = threading.Semaphore(fetch)
+        self.upload = threading.Semaphore(upload)
+        self.save = threading.Lock()
+
+
+def ingest_video(video_id, data, vector_store, limits):
+    """
+    Fetch one video, then split, embed and upload it as a stream.
+
+    Returns:
+        Dict with the number of chunks and whether the upload was skipped
+    """
+    chunks = get_transcript(data, video_id)
+    cached = chunks is not None
+    if cached:
+        if is_indexed(data, video_id, chunks):
+            return {"chunks": len(chunks), "skipped": True}
+        stream = cached_chunk_stream(chunks, get_timings(data, video_id))
+    else:
+        with limits.fetch:
+            snippets = fetchTranscript(video_id)
+        stream = iterTranscriptChunks(snippets)
+
+    with limits.upload:
+        chunks, timings = stream_upload(vector_store, video_id, stream, data=data)
+    if not chunks:
+        raise ValueError("empty transcript")
+
+    with limits.save:
+        if not cached:
+            add_transcript(data, video_id, chunks, timings)
+            get_lexical_index().add_video(video_id, chunks, timings)
+        mark_indexed(data, video_id, chunks)
+        save_data(data)
+    return {"chunks": len(chunks), "skipped": False}
+
+
+def ingest_all(
+    video_ids,
+    data,
+    vector_store,
+    workers=INGEST_WORKERS,
+    fetch_concurrency=INGEST_FETCH_CONCURRENCY,
+    upload_concurrency=INGEST_UPLOAD_CONCURRENCY,
+):
+    """
+    Ingest many videos concurrently, printing progress as each one finishes.
+
+    Returns:
+        Summary dict with counts, failures and throughput
+    """
+    limits = StageLimits(fetch_concurrency, upload_concurrency)
+    # Warm the fetch cache for every video while the first ones are uploading;
+    # prefetches share the fetch limit, so --fetch-concurrency still caps YouTube
+    get_fetcher().prefetch(
+        [video_id for video_id in video_ids if get_transcript(data, video_id) is None],
+        limit=limits.fetch,
+    )
+    results = {}
+    failures = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(ingest_video, video_id, data, vector_store, limits): video_id
+            for video_id in video_ids
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            video_id = futures[future]
+            try:
+                results[video_id] = future.result()
+            except Exception as e:
+                failures[video_id] = str(e)
+                state = ingest_state(data, video_id)
+                print(f"[{done}/{len(video_ids)}] ✗ {video_id}: {e} ({state})")
+                continue
+            status = "skipped" if results[video_id]["skipped"] else "indexed"
+            print(
+                f"[{done}/{len(video_ids)}] ✓ {video_id}: "
+                f"{results[video_id]['chunks']} chunks ({status})"
+            )
+
+    elapsed = time.perf_counter() - start
+    chunks = sum(result["chunks"] for result in results.values())
+    return {
+        "videos": len(results),
+        "skipped": sum(result["skipped"] for result in results.values()),
+        "chunks": chunks,
+        "failures": failures,
+        "seconds": elapsed,
+        "videos_per_minute": len(results) / elapsed * 60 if elapsed else 0.0,
+        "chunks_per_second": chunks / elapsed if elapsed else 0.0,
+    }
+
+
+def print_summary(summary):
+    """Print throughput and failures for an ingestion run."""
+    print("-" * 50)
+    print(
+        f"Ingested {summary['videos']} videos "
+        f"({summary['skipped']} already indexed), "
+        f"{summary['chunks']} chunks in {summary['seconds']:.1f}s"
+    )
+    print(
+        f"Throughput: {summary['videos_per_minute']:.1f} videos/min, "
+        f"{summary['chunks_per_second']:.1f} chunks/s"
+    )
+    if summary["failures"]:
+        print(f"Failures ({len(summary['failures'])}):")
+        for video_id, error in summary["failures"].items():
+            print(f"  {video_id}: {error}")
+
+
+def print_status(data, video_ids=None):
+    """Print the ingestion state of the given videos, or of every known one."""
+    if video_ids is None:
+        states = ingest_states(data)
+    else:
+        states = {video_id: ingest_state(data, video_id) for video_id in video_ids}
+    for video_id, state in states.items():
+        line = f"{video_id}: {state}"
+        if state == "partial":
+            progress = data.get_progress(video_id)
+            line += (
+                f" ({progress['upserted']} chunks upserted, "
+                f"{progress['embedded']} embedded)"
+            )
+        print(line)
+    counts = Counter(states.values())
+    print(", ".join(f"{count} {state}" for state, count in sorted(counts.items())))
+
+
+def main():
+    """Bulk ingestion flow."""
+    parser = argparse.ArgumentParser(description="Index many YouTube videos.")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        help="File with one URL or video ID per line (default: stdin)",
+    )
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument(
+        "--fetch-concurrency", type=int, default=INGEST_FETCH_CONCURRENCY
+    )
+    parser.add_argument(
+        "--upload-concurrency", type=int, default=INGEST_UPLOAD_CONCURRENCY
+    )
+    parser.add_argument(
+        "--collection", help="Save the ingested videos as a named collection"
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Show pending/partial/complete state instead of ingesting",
+    )
+    args = parser.parse_args()
+
+    if args.status:
+        data = load_data()
+        if args.input:
+            with open(args.input, "r") as f:
+                print_status(data, read_video_ids(f))
+        else:
+            print_status(data)
+        return
+
+    if args.input:
+        with open(args.input, "r") as f:
+            video_ids = read_video_ids(f)
+    else:
+        video_ids = read_video_ids(sys.stdin)
+
+    if not video_ids:
+        print("No videos to ingest.")
+        return
+
+    print(f"Initializing services for {len(video_ids)} videos...")
+    vector_store = initialize_vector_store()
+    data = load_data()
+    # The BM25 index reads transcripts from the same store
+    get_lexical_index(data)
+
+    summary = ingest_all(
+        video_ids,
+        data,
+        vector_store,
+        workers=args.workers,
+        fetch_concurrency=args.fetch_concurrency,
+        upload_concurrency=args.upload_concurrency,
+    )
+    print_summary(summary)
+    if args.collection:
+        ingested = [
+            video_id for video_id in video_ids if video_id not in summary["failures"]
+        ]
+        data.put_collection(args.collection, ingested)
+        print(f"Saved collection {args.collection} ({len(ingested)} videos)")
+    if summary["failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
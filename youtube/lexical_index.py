@@ -0,0 +1,284 @@
+"""
+Lexical index module for BM25 keyword search over cached transcript chunks.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+from langchain_core.documents import Document
+from data_manager import load_data, get_transcript, get_timings
+from pinecone_manager import search_similar, search_collection
+from metrics import span
+from config import BM25_K1, BM25_B, RRF_K
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+_SENTENCE_END = (".", "!", "?", ":", ";")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can did do does for from has have how i in is "
+    "it its me of on or say says said that the their them they this to was what "
+    "when where which who why will with you your about video".split()
+)
+
+
+def tokenize(text):
+    """Lowercase a text and split it into word tokens."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def is_keyword_query(query):
+    """
+    Check whether a query hinges on exact terms the embedding may blur.
+
+    Quoted phrases, numbers and capitalized names count as exact terms, as
+    do short queries made only of non-stopwords. Capitalized words only
+    count mid-sentence, and the pronoun "I" never does.
+    """
+    if '"' in query:
+        return True
+    words = query.split()
+    if any(any(ch.isdigit() for ch in word) for word in words):
+        return True
+    for previous, word in zip(words, words[1:]):
+        if previous.endswith(_SENTENCE_END) or not word[:1].isupper():
+            continue
+        if re.split(r"\W", word, maxsplit=1)[0] != "I":
+            return True
+    terms = tokenize(query)
+    return 0 < len(terms) <= 3 and not any(term in _STOPWORDS for term in terms)
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index partitioned by video.
+
+    Each video keeps its own postings so a filtered search only touches that
+    video's chunks, while document frequencies and the average chunk length
+    are shared across every indexed video. Videos are indexed the first time
+    they are searched, or explicitly with add_video() right after ingestion.
+    """
+
+    def __init__(self, data=None, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._data = data
+        self._lock = threading.Lock()
+        self._videos = {}
+        self._df = Counter()
+        self._total_docs = 0
+        self._total_length = 0
+
+    def _store(self):
+        if self._data is None:
+            self._data = load_data()
+        return self._data
+
+    def add_video(self, video_id, chunks, timings=None):
+        """Index (or re-index) a video's chunks."""
+        postings = {}
+        lengths = []
+        for position, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((position, tf))
+
+        with self._lock:
+            self._remove(video_id)
+            self._videos[video_id] = {
+                "postings": postings,
+                "lengths": lengths,
+                "chunks": chunks,
+                "timings": timings,
+            }
+            for term, entries in postings.items():
+                self._df[term] += len(entries)
+            self._total_docs += len(chunks)
+            self._total_length += sum(lengths)
+
+    def _remove(self, video_id):
+        video = self._videos.pop(video_id, None)
+        if video is None:
+            return
+        for term, entries in video["postings"].items():
+            self._df[term] -= len(entries)
+            if self._df[term] <= 0:
+                del self._df[term]
+        self._total_docs -= len(video["chunks"])
+        self._total_length -= sum(video["lengths"])
+
+    def _ensure_video(self, video_id):
+        """Index a video from the transcript store if it is not indexed yet."""
+        with self._lock:
+            if video_id in self._videos:
+                return True
+        data = self._store()
+        chunks = get_transcript(data, video_id)
+        if chunks is None:
+            return False
+        self.add_video(video_id, chunks, get_timings(data, video_id))
+        return True
+
+    def search(self, query, youtube_id, k=10):
+        """
+        Rank a video's chunks against a query with BM25.
+
+        Returns:
+            List of (Document, score) pairs, best first; only chunks sharing
+            at least one term with the query are returned
+        """
+        return self.search_videos(query, [youtube_id], k=k)
+
+    def search_videos(self, query, video_ids, k=10):
+        """
+        Rank the chunks of several videos against a query with BM25.
+
+        Every video is indexed before any is scored, and all are scored
+        under one lock, so the scores share the same document frequencies
+        and average length and can be compared across videos.
+
+        Returns:
+            The k best (Document, score) pairs across the videos, best first
+        """
+        video_ids = [video_id for video_id in video_ids if self._ensure_video(video_id)]
+        if not video_ids:
+            return []
+
+        terms = set(tokenize(query))
+        scored = []
+        with span("bm25", k=k, videos=len(video_ids)) as record, self._lock:
+            if not self._total_docs:
+                return []
+            avg_length = self._total_length / self._total_docs
+            idf = {}
+            for term in terms:
+                df = self._df.get(term)
+                if df:
+                    idf[term] = math.log(1 + (self._total_docs - df + 0.5) / (df + 0.5))
+            for video_id in video_ids:
+                video = self._videos[video_id]
+                scores = Counter()
+                for term, weight in idf.items():
+                    for position, tf in video["postings"].get(term, ()):
+                        length = video["lengths"][position]
+                        norm = 1 - self.b + self.b * length / avg_length
+                        scores[position] += (
+                            weight * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                        )
+                scored.extend(
+                    (score, video_id, video, position)
+                    for position, score in scores.most_common(k)
+                )
+            scored.sort(key=lambda item: item[0], reverse=True)
+            record["results"] = min(k, len(scored))
+
+        results = []
+        for score, video_id, video, position in scored[:k]:
+            metadata = {"source_video": video_id, "chunk": position}
+            if video["timings"] is not None:
+                metadata["start"], metadata["end"] = video["timings"][position]
+            results.append(
+                (
+                    Document(page_content=video["chunks"][position], metadata=metadata),
+                    score,
+                )
+            )
+        return results
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_lexical_index(data=None):
+    """
+    Return the process-wide BM25 index.
+
+    Args:
+        data: The process's transcript store; the first caller that passes
+            one binds it, so the index reads the same store instead of
+            opening its own
+    """
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = BM25Index(data)
+        elif _shared_index._data is None:
+            _shared_index._data = data
+        return _shared_index
+
+
+def _doc_key(doc):
+    position = doc.metadata.get("chunk")
+    if position is None:
+        return doc.page_content
+    return (doc.metadata.get("source_video"), int(position))
+
+
+def reciprocal_rank_fusion(result_lists, k=10, rrf_k=RRF_K):
+    """Fuse ranked Document lists, scoring each document by sum(1 / (rrf_k + rank))."""
+    scores = Counter()
+    docs = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _doc_key(doc)
+            scores[key] += 1 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key, _ in scores.most_common(k)]
+
+
+def keyword_search(query, video_ids, k=10):
+    """
+    Answer keyword-heavy queries from BM25 alone, without any embedding.
+
+    Returns:
+        The top k lexical matches across the videos when the query is a
+        keyword query and all its terms appear in the best match, else None
+    """
+    if not is_keyword_query(query):
+        return None
+    lexical = get_lexical_index().search_videos(query, video_ids, k=k)
+    if not lexical:
+        return None
+    terms = set(tokenize(query)) - _STOPWORDS
+    if not terms <= set(tokenize(lexical[0][0].page_content)):
+        return None
+    return [doc for doc, _ in lexical[:k]]
+
+
+def hybrid_search(vector_store, query, youtube_id, k=10):
+    """
+    Search a video's chunks with both BM25 and vector similarity.
+
+    Keyword-heavy queries whose terms all appear in the best lexical match
+    skip the query embedding and the vector store call altogether. Otherwise
+    both result lists are merged with reciprocal rank fusion.
+    """
+    shortcut = keyword_search(query, [youtube_id], k=k)
+    if shortcut is not None:
+        return shortcut
+
+    lexical = [doc for doc, _ in get_lexical_index().search(query, youtube_id, k=k)]
+    vector = search_similar(vector_store, query, youtube_id, k=k)
+    return reciprocal_rank_fusion([vector, lexical], k=k)
+
+
+def hybrid_search_collection(vector_store, query, video_ids, k=10):
+    """
+    Search a collection of videos with both BM25 and vector similarity.
+
+    All videos are BM25-indexed before any is scored, so their lexical
+    scores share the same statistics and are merged by score before fusing
+    them with the vector results.
+    Keyword queries short-circuit as in hybrid_search.
+    """
+    shortcut = keyword_search(query, video_ids, k=k)
+    if shortcut is not None:
+        return shortcut
+
+    lexical = get_lexical_index().search_videos(query, video_ids, k=k)
+    vector = search_collection(vector_store, query, video_ids, k=k)
+    return reciprocal_rank_fusion([vector, [doc for doc, _ in lexical]], k=k)
@@ -2,24 +2,83 @@
 LLM handler module for language model initialization and queries.
 """
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+import time
+from context_builder import build_context, estimate_tokens
+from metrics import span
 from config import LLM_MODEL
 
 
 def initialize_llm():
     """Initialize the language model."""
+    # Imported here because the Gemini SDK is slow to import
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     return ChatGoogleGenerativeAI(model=LLM_MODEL)
 
 
-def query_llm(llm, user_query, context):
-    """Query the LLM with context from retrieved documents."""
-    messages = [
+def build_messages(user_query, context):
+    """Build the chat messages for a question and its retrieved documents."""
+    return [
         (
             "system",
-            "You are a helpful assistant that can answer questions about a given topic based on the provided context.",
+            "You are a helpful assistant that can answer questions about a given topic based on the provided context. "
+            "When a passage is labelled with a time range, cite the timestamp you used, e.g. (00:12:30). "
+            "When the passages come from several videos, say which video each point comes from.",
         ),
-        ("human", f"Context: {context}\n\nQuestion: {user_query}"),
+        ("human", f"Context:\n{build_context(context)}\n\nQuestion: {user_query}"),
     ]
 
-    response = llm.invoke(messages)
+
+def query_llm(llm, user_query, context):
+    """Query the LLM with context from retrieved documents."""
+    messages = build_messages(user_query, context)
+    with span("llm") as record:
+        record["prompt_tokens"] = sum(estimate_tokens(text) for _, text in messages)
+        response = llm.invoke(messages)
+        record["answer_chars"] = len(response.content)
     return response.content
+
+
+def _chunk_text(chunk):
+    """Extract the text of a streamed message chunk."""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in content
+    )
+
+
+def stream_llm(llm, user_query, context, timings=None):
+    """
+    Query the LLM and yield the answer text as it is generated.
+
+    Args:
+        llm: Chat model
+        user_query: User question
+        context: Retrieved documents
+        timings: Optional dict filled with "prompt_tokens" (estimated) and
+            "first_token" and "total" seconds
+
+    Yields:
+        Pieces of the answer text
+    """
+    if timings is None:
+        timings = {}
+    start = time.perf_counter()
+    messages = build_messages(user_query, context)
+    timings["prompt_tokens"] = sum(estimate_tokens(text) for _, text in messages)
+    with span("llm", prompt_tokens=timings["prompt_tokens"]) as record:
+        answer_chars = 0
+        for chunk in llm.stream(messages):
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if "first_token" not in timings:
+                timings["first_token"] = time.perf_counter() - start
+                record["first_token_ms"] = timings["first_token"] * 1000
+            answer_chars += len(text)
+            record["answer_chars"] = answer_chars
+            yield text
+    timings["total"] = time.perf_counter() - start
@@ -0,0 +1,190 @@
+"""
+Local vector store module backed by memory-mapped NumPy arrays.
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from config import LOCAL_STORE_DIR
+
+
+class LocalVectorStore:
+    """
+    Offline drop-in replacement for PineconeVectorStore.
+
+    Vectors are partitioned by the "source_video" metadata field. Each video
+    gets a directory holding a float32 matrix of L2-normalized embeddings
+    (vectors.npy, memory-mapped on read) and its documents (docs.json), so a
+    filtered search only touches that video's rows and scores them with a
+    single matrix-vector product.
+    """
+
+    def __init__(self, embedding, path=LOCAL_STORE_DIR):
+        self.embeddings = embedding
+        self.path = path
+        self._lock = threading.Lock()
+        self._partitions = {}
+        self._writers = {}
+        os.makedirs(path, exist_ok=True)
+
+    def _partition_dir(self, video_id):
+        return os.path.join(self.path, video_id)
+
+    def _writer_lock(self, video_id):
+        """Return the lock serializing read-merge-write upserts of one video."""
+        with self._lock:
+            return self._writers.setdefault(video_id, threading.Lock())
+
+    def _load(self, video_id):
+        """Return (vectors, docs) for a video, or None if it has no partition."""
+        with self._lock:
+            if video_id in self._partitions:
+                return self._partitions[video_id]
+            directory = self._partition_dir(video_id)
+            try:
+                vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+                with open(os.path.join(directory, "docs.json"), "r") as f:
+                    docs = json.load(f)
+            except FileNotFoundError:
+                return None
+            self._partitions[video_id] = (vectors, docs)
+            return vectors, docs
+
+    def _write(self, video_id, vectors, docs):
+        """Atomically replace a video's partition on disk."""
+        directory = self._partition_dir(video_id)
+        os.makedirs(directory, exist_ok=True)
+        fd, vectors_tmp = tempfile.mkstemp(dir=directory, suffix=".tmp.npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, vectors)
+        fd, docs_tmp = tempfile.mkstemp(dir=directory, suffix=".tmp.json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(docs, f)
+        os.replace(vectors_tmp, os.path.join(directory, "vectors.npy"))
+        os.replace(docs_tmp, os.path.join(directory, "docs.json"))
+        with self._lock:
+            self._partitions.pop(video_id, None)
+
+    def video_ids(self):
+        """Return the IDs of all videos with a partition."""
+        return [
+            name
+            for name in os.listdir(self.path)
+            if os.path.isdir(self._partition_dir(name))
+        ]
+
+    def add_documents(self, documents, ids=None):
+        """Embed and upsert documents, replacing any with the same ID."""
+        if ids is None:
+            ids = [
+                f"{doc.metadata.get('source_video', '')}-{i}"
+                for i, doc in enumerate(documents)
+            ]
+        vectors = self.embeddings.embed_documents(
+            [doc.page_content for doc in documents]
+        )
+        return self.add_embeddings(documents, vectors, ids)
+
+    def add_embeddings(self, documents, vectors, ids):
+        """Upsert documents with precomputed embeddings, replacing matching IDs."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        by_video = {}
+        for row, (doc_id, doc) in enumerate(zip(ids, documents)):
+            video_id = doc.metadata.get("source_video", "_default")
+            by_video.setdefault(video_id, []).append((row, doc_id, doc))
+
+        for video_id, items in by_video.items():
+            with self._writer_lock(video_id):
+                self._upsert(video_id, vectors, items)
+
+        return list(ids)
+
+    def _upsert(self, video_id, vectors, items):
+        """Merge (row, id, doc) items into a video's partition and rewrite it."""
+        existing = self._load(video_id)
+        if existing is None:
+            old_vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            old_docs = []
+        else:
+            old_vectors, old_docs = existing
+
+        new_ids = {doc_id for _, doc_id, _ in items}
+        keep = [i for i, doc in enumerate(old_docs) if doc["id"] not in new_ids]
+        merged_vectors = np.concatenate(
+            [np.asarray(old_vectors[keep]), vectors[[row for row, _, _ in items]]]
+        )
+        merged_docs = [old_docs[i] for i in keep] + [
+            {"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}
+            for _, doc_id, doc in items
+        ]
+        self._write(video_id, merged_vectors, merged_docs)
+
+    def _candidate_videos(self, filter):
+        """Resolve a Pinecone-style source_video filter to partition names."""
+        if not filter or "source_video" not in filter:
+            return self.video_ids()
+        condition = filter["source_video"]
+        if isinstance(condition, dict):
+            if "$in" in condition:
+                return list(condition["$in"])
+            return [condition["$eq"]]
+        return [condition]
+
+    def _top(self, embedding, k, filter):
+        """Return the k best (score, doc, vector) triples across candidate videos."""
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        scored = []
+        for video_id in self._candidate_videos(filter):
+            partition = self._load(video_id)
+            if partition is None or len(partition[1]) == 0:
+                continue
+            vectors, docs = partition
+            scores = vectors @ query
+            top = min(k, len(scores))
+            best = np.argpartition(-scores, top - 1)[:top]
+            scored.extend((float(scores[i]), docs[i], vectors[i]) for i in best)
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:k]
+
+    @staticmethod
+    def _document(doc):
+        return Document(
+            id=doc["id"], page_content=doc["text"], metadata=doc["metadata"]
+        )
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None):
+        """Return the k most similar (Document, cosine score) pairs."""
+        return [
+            (self._document(doc), score)
+            for score, doc, _ in self._top(embedding, k, filter)
+        ]
+
+    def similarity_search_by_vector_with_vectors(self, embedding, k=4, filter=None):
+        """
+        Return the k most similar Documents with their normalized vectors.
+
+        Returns:
+            Tuple of (Documents, float32 matrix with one row per Document)
+        """
+        top = self._top(embedding, k, filter)
+        vectors = np.array([vector for _, _, vector in top], dtype=np.float32)
+        return [self._document(doc) for _, doc, _ in top], vectors
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        """Embed the query and return the k most similar (Document, score) pairs."""
+        return self.similarity_search_by_vector_with_score(
+            self.embeddings.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search(self, query, k=4, filter=None):
+        """Embed the query and return the k most similar Documents."""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
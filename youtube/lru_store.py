@@ -0,0 +1,105 @@
+"""
+Size-bounded key/value tables in SQLite with least-recently-used eviction.
+
+Shared by the embedding and summary caches. Each store is one table of
+(key, value, last_used) where last_used is a logical clock, so lookups refresh
+an entry's position and inserts evict the oldest overflow in the same
+transaction.
+"""
+
+import sqlite3
+import threading
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+class LRUStore:
+    """
+    Key/value table with LRU eviction, safe to share between threads.
+
+    Args:
+        path: SQLite database file
+        table: Table name; also prefixes its last_used index
+        value_column: Name and SQL type of the value column, e.g.
+            "vector BLOB"; kept as-is so existing databases stay readable
+        max_entries: Entries kept before the least recently used are evicted
+    """
+
+    def __init__(self, path, table, value_column, max_entries):
+        self.table = table
+        self.value_column = value_column.split()[0]
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"key TEXT PRIMARY KEY, {value_column} NOT NULL, "
+            "last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)"
+        )
+        row = self._conn.execute(f"SELECT MAX(last_used) FROM {table}").fetchone()
+        self._clock = row[0] or 0
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get_many(self, keys):
+        """Return {key: value} for the stored keys and refresh their LRU stamp."""
+        found = {}
+        with self._lock, self._conn:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start : start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, {self.value_column} FROM {self.table} "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                stamp = self._tick()
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_used = ? WHERE key = ?",
+                    [(stamp, key) for key in found],
+                )
+        return found
+
+    def get(self, key):
+        """Return the value stored for a key, or None."""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Insert (key, value) pairs and evict the least recently used overflow."""
+        with self._lock, self._conn:
+            stamp = self._tick()
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} "
+                f"(key, {self.value_column}, last_used) VALUES (?, ?, ?)",
+                [(key, value, stamp) for key, value in items],
+            )
+            (count,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def put(self, key, value):
+        """Store one value."""
+        self.put_many([(key, value)])
+
+    def size(self):
+        """Return the number of stored entries."""
+        with self._lock:
+            (size,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()
+        return size
@@ -3,14 +3,25 @@ Main orchestrator for YouTube Transcript Downloader.
 Entry point for the application.
 """
 
-import streamlit as st
-
-
-from transcript import ApiCall
-from chunking import splitText
-from data_manager import load_data, save_data, add_transcript
-from pinecone_manager import initialize_pinecone, upload_to_pinecone, search_similar
-from llm_handler import initialize_llm, query_llm
+from transcript import fetchTranscript, cleanData
+from chunking import iterTranscriptChunks
+from data_manager import (
+    load_data,
+    save_data,
+    add_transcript,
+    get_transcript,
+    get_timings,
+    is_indexed,
+    mark_indexed,
+    ingest_state,
+)
+from pinecone_manager import initialize_vector_store
+from pipeline import stream_upload, cached_chunk_stream
+from llm_handler import initialize_llm, stream_llm
+from answer_cache import AnswerCache, collection_key
+from lexical_index import get_lexical_index, keyword_search
+from retrieval import retrieve
+from metrics import span, trace, format_trace
 from config import SEARCH_K
 
 
@@ -32,56 +43,141 @@ def extract_video_id(url_or_id):
     return youtube_id
 
 
+def query_loop(vector_store, llm, answer_cache, video_ids):
+    """Answer questions about one video or a collection until the user quits."""
+    if len(video_ids) == 1:
+        scope = video_ids[0]
+    else:
+        scope = collection_key(video_ids)
+
+    while True:
+        user_query = input("\nWhat do you want to know? (or 'quit' to exit): ")
+
+        if user_query.lower() in ["quit", "exit", "q"]:
+            print("Goodbye!")
+            break
+
+        with trace() as spans:
+            # Exact repeats and keyword queries need no query embedding
+            cached = answer_cache.get(scope, user_query)
+            embedding = None
+            results = None
+            if cached is None:
+                results = keyword_search(user_query, video_ids, k=SEARCH_K)
+            if cached is None and results is None:
+                # Serve near-duplicate questions from the cache
+                embedding = vector_store.embeddings.embed_query(user_query)
+                cached = answer_cache.get(scope, user_query, embedding)
+            if cached is not None:
+                print(f"\n{cached}\n")
+                print("[Served from the answer cache]")
+                continue
+
+            # Search for relevant chunks
+            if results is None:
+                results = retrieve(
+                    vector_store,
+                    user_query,
+                    video_ids,
+                    k=SEARCH_K,
+                    query_vector=embedding,
+                )
+
+            # Query LLM with context, printing the answer as it streams in
+            timings = {}
+            print()
+            answer = []
+            for token in stream_llm(llm, user_query, results, timings):
+                print(token, end="", flush=True)
+                answer.append(token)
+            print("\n")
+        answer_cache.put(scope, user_query, embedding, "".join(answer))
+        if "first_token" in timings:
+            print(
+                f"[First token in {timings['first_token']:.2f}s, "
+                f"total {timings['total']:.2f}s]"
+            )
+
+        # Optionally show sources
+        videos = sorted({doc.metadata.get("source_video") for doc in results})
+        print(f"[Retrieved {len(results)} relevant chunks from {', '.join(videos)}]")
+        print(f"[{format_trace(spans)}]")
+
+
 def main():
     """Main application flow."""
     print("Hello! Welcome to YouTube Transcript Downloader")
 
     # Initialize services
     print("Initializing services...")
-    vector_store = initialize_pinecone()
-    llm = initialize_llm()
+    with span("init_services") as record:
+        vector_store = initialize_vector_store()
+        llm = initialize_llm()
+        answer_cache = AnswerCache()
+    print(f"Services ready in {record['ms']:.0f}ms")
 
-    # Load cached data
+    # Load cached data; the BM25 index reads transcripts from the same store
     data = load_data()
+    get_lexical_index(data)
+
+    # Get YouTube URL (or a saved collection) from user
+    youtube_url = input("Enter the YouTube URL (or @collection): ")
+    if youtube_url.startswith("@"):
+        video_ids = data.get_collection(youtube_url[1:])
+        if not video_ids:
+            print(f"No collection named {youtube_url[1:]}.")
+            return
+        print(f"Asking across {len(video_ids)} videos")
+        query_loop(vector_store, llm, answer_cache, video_ids)
+        return
 
-    # Get YouTube URL from user
-    youtube_url = input("Enter the YouTube URL: ")
     youtube_id = extract_video_id(youtube_url)
 
     # Fetch transcript (from cache or API)
     print(f"Fetching transcript for video: {youtube_id}")
-    transcript = ApiCall(youtube_id, data)
+    print(f"Ingestion state: {ingest_state(data, youtube_id)}")
+    chunks = get_transcript(data, youtube_id)
+    if chunks is not None:
+        # Cached transcripts are stored already chunked
+        timings = get_timings(data, youtube_id)
+        transcript = " ".join(chunks)
+    else:
+        snippets = fetchTranscript(youtube_id)
+        transcript = cleanData(snippets)
     print(f"Transcript length: {len(transcript)} characters")
 
     if transcript:
-        # Split into chunks
-        chunks = splitText(transcript)
+        if chunks is None:
+            # Split into timed chunks, embedding and uploading them as they come
+            chunks, timings = stream_upload(
+                vector_store, youtube_id, iterTranscriptChunks(snippets), data=data
+            )
+
+            # Save to cache
+            data = add_transcript(data, youtube_id, chunks, timings)
+            get_lexical_index().add_video(youtube_id, chunks, timings)
+            data = mark_indexed(data, youtube_id, chunks)
+            save_data(data)
+        elif is_indexed(data, youtube_id, chunks):
+            print("Video already indexed, skipping upload")
+        else:
+            stream_upload(
+                vector_store,
+                youtube_id,
+                cached_chunk_stream(chunks, timings),
+                data=data,
+            )
+            data = mark_indexed(data, youtube_id, chunks)
+            save_data(data)
         print(f"Split into {len(chunks)} chunks")
 
-        # Save to cache
-        data = add_transcript(data, youtube_id, chunks)
-        save_data(data)
-
-        # Upload to Pinecone
-        upload_to_pinecone(vector_store, chunks, youtube_id)
-
-        # Query loop
-        while True:
-            user_query = input("\nWhat do you want to know? (or 'quit' to exit): ")
-
-            if user_query.lower() in ["quit", "exit", "q"]:
-                print("Goodbye!")
-                break
-
-            # Search for relevant chunks
-            results = search_similar(vector_store, user_query, youtube_id, k=SEARCH_K)
-
-            # Query LLM with context
-            answer = query_llm(llm, user_query, results)
-            print(f"\n{answer}\n")
+        cache_stats = vector_store.embeddings.stats()
+        print(
+            f"Embedding cache: {cache_stats['hits']} hits, "
+            f"{cache_stats['misses']} misses"
+        )
 
-            # Optionally show sources
-            print(f"[Retrieved {len(results)} relevant chunks]")
+        query_loop(vector_store, llm, answer_cache, [youtube_id])
     else:
         print("Failed to fetch transcript.")
 
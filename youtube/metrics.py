@@ -0,0 +1,159 @@
+"""
+Metrics module for lightweight tracing of pipeline stages.
+
+Wrap a stage in `span()` to record its duration and payload sizes:
+
+    with span("split", chars=len(text)) as record:
+        chunks = splitText(text)
+        record["chunks"] = len(chunks)
+
+Spans feed process-wide Prometheus-style histograms and counters, rolling
+percentiles, optionally a JSON lines file, and the trace of the enclosing
+`trace()` block so a single request can be broken down by stage.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import METRICS_JSONL_PATH, METRICS_HISTORY
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_lock = threading.Lock()
+_stats = {}
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def _record(record):
+    seconds = record["ms"] / 1000
+    with _lock:
+        stats = _stats.get(record["name"])
+        if stats is None:
+            stats = _stats[record["name"]] = {
+                "count": 0,
+                "sum": 0.0,
+                "buckets": [0] * len(BUCKETS),
+                "recent": deque(maxlen=METRICS_HISTORY),
+                "totals": {},
+            }
+        stats["count"] += 1
+        stats["sum"] += seconds
+        stats["recent"].append(record["ms"])
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats["buckets"][i] += 1
+        for key, value in record.items():
+            if key not in ("name", "ms") and isinstance(value, (int, float)):
+                stats["totals"][key] = stats["totals"].get(key, 0) + value
+
+        if METRICS_JSONL_PATH:
+            with open(METRICS_JSONL_PATH, "a") as f:
+                f.write(json.dumps({"ts": time.time(), **record}, default=str) + "\n")
+
+    spans = _current_trace.get()
+    if spans is not None:
+        spans.append(record)
+
+
+def observe(name, ms, **attributes):
+    """Record a span whose duration was measured by the caller."""
+    _record({"name": name, **attributes, "ms": ms})
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block of code as a named span.
+
+    Yields:
+        The span record; add payload sizes or cache hits to it as keys
+    """
+    record = {"name": name, **attributes}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["ms"] = (time.perf_counter() - start) * 1000
+        _record(record)
+
+
+@contextmanager
+def trace():
+    """
+    Collect the spans recorded in this block.
+
+    Yields:
+        List that receives each finished span record, in completion order
+    """
+    spans = []
+    token = _current_trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _current_trace.reset(token)
+
+
+def format_trace(spans):
+    """Summarize a trace as "name 12ms · name 340ms" in completion order."""
+    return " · ".join(f"{record['name']} {record['ms']:.0f}ms" for record in spans)
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def rolling_percentiles():
+    """Return count, p50 and p95 milliseconds of recent durations per span."""
+    with _lock:
+        recent = {name: sorted(stats["recent"]) for name, stats in _stats.items()}
+    return {
+        name: {
+            "count": len(durations),
+            "p50_ms": _percentile(durations, 0.50),
+            "p95_ms": _percentile(durations, 0.95),
+        }
+        for name, durations in recent.items()
+        if durations
+    }
+
+
+def prometheus_text():
+    """Render all spans in the Prometheus text exposition format."""
+    lines = [
+        "# HELP youtube_span_seconds Duration of pipeline stages.",
+        "# TYPE youtube_span_seconds histogram",
+    ]
+    with _lock:
+        snapshot = {
+            name: (
+                stats["count"],
+                stats["sum"],
+                list(stats["buckets"]),
+                dict(stats["totals"]),
+            )
+            for name, stats in _stats.items()
+        }
+    for name, (count, total, buckets, _) in sorted(snapshot.items()):
+        for bound, value in zip(BUCKETS, buckets):
+            lines.append(
+                f'youtube_span_seconds_bucket{{span="{name}",le="{bound}"}} {value}'
+            )
+        lines.append(f'youtube_span_seconds_bucket{{span="{name}",le="+Inf"}} {count}')
+        lines.append(f'youtube_span_seconds_sum{{span="{name}"}} {total}')
+        lines.append(f'youtube_span_seconds_count{{span="{name}"}} {count}')
+
+    lines.append(
+        "# HELP youtube_span_payload_total Payload sizes and cache hits summed per stage."
+    )
+    lines.append("# TYPE youtube_span_payload_total counter")
+    for name, (_, _, _, totals) in sorted(snapshot.items()):
+        for field, value in sorted(totals.items()):
+            lines.append(
+                f'youtube_span_payload_total{{span="{name}",field="{field}"}} {value}'
+            )
+    return "\n".join(lines) + "\n"
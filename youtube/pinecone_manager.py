@@ -1,18 +1,49 @@
 """
 Pinecone manager module for vector store initialization and operations.
+
+The Pinecone and Gemini SDKs are imported inside the initializers, so
+importing this module stays cheap until a client is actually created.
 """
 
-from pinecone import Pinecone
-from langchain_pinecone import PineconeVectorStore
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import hashlib
+
+import numpy as np
 from langchain_core.documents import Document
-from config import PINECONE_API_KEY, PINECONE_INDEX_NAME, EMBEDDING_MODEL
+from embedding_cache import CachedEmbeddings
+from local_store import LocalVectorStore
+from metrics import span
+from config import (
+    PINECONE_API_KEY,
+    PINECONE_INDEX_NAME,
+    EMBEDDING_MODEL,
+    VECTOR_STORE_BACKEND,
+)
+
+
+def initialize_embeddings():
+    """Initialize the embeddings model behind the on-disk cache."""
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    return CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL
+    )
+
+
+def initialize_vector_store():
+    """Initialize the vector store selected by VECTOR_STORE_BACKEND."""
+    if VECTOR_STORE_BACKEND == "pinecone":
+        return initialize_pinecone()
+    if VECTOR_STORE_BACKEND == "local":
+        return LocalVectorStore(embedding=initialize_embeddings())
+    raise ValueError(f"Unknown vector store backend: {VECTOR_STORE_BACKEND}")
 
 
 def initialize_pinecone():
     """Initialize Pinecone client and vector store."""
-    # Initialize embeddings
-    embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+    from pinecone import Pinecone
+    from langchain_pinecone import PineconeVectorStore
+
+    embeddings = initialize_embeddings()
 
     # Initialize Pinecone
     pc = Pinecone(api_key=PINECONE_API_KEY)
@@ -24,23 +55,131 @@ def initialize_pinecone():
     return vector_store
 
 
-def upload_to_pinecone(vector_store, chunks, youtube_id):
-    """Upload document chunks to Pinecone."""
-    documents = [
-        Document(page_content=chunk, metadata={"source_video": youtube_id})
-        for chunk in chunks
+def chunk_ids(youtube_id, chunks, start=0):
+    """
+    Build deterministic vector IDs from the video ID, chunk position and content.
+
+    Re-uploading the same chunks overwrites the existing vectors instead of
+    adding duplicates. `start` is the position of the first chunk.
+    """
+    return [
+        f"{youtube_id}-{i:05d}-{hashlib.sha1(chunk.encode('utf-8')).hexdigest()[:12]}"
+        for i, chunk in enumerate(chunks, start=start)
     ]
 
-    doc_ids = vector_store.add_documents(documents)
-    print(f"✓ Uploaded {len(doc_ids)} chunks to Pinecone")
-    return doc_ids
+
+def upsert_vectors(vector_store, youtube_id, start, chunks, timings, vectors):
+    """
+    Upsert chunks whose embeddings were already computed.
+
+    Args:
+        vector_store: PineconeVectorStore or LocalVectorStore
+        youtube_id: YouTube video ID
+        start: Position of the first chunk in the transcript
+        chunks: Chunk texts
+        timings: [start, end] seconds per chunk, or None entries if unknown
+        vectors: Embedding per chunk
+
+    Returns:
+        Vector IDs
+    """
+    ids = chunk_ids(youtube_id, chunks, start)
+    metadatas = []
+    for position, timing in enumerate(timings, start=start):
+        metadata = {"source_video": youtube_id, "chunk": position}
+        if timing is not None:
+            metadata["start"], metadata["end"] = timing
+        metadatas.append(metadata)
+
+    with span("upsert", chunks=len(chunks)):
+        if isinstance(vector_store, LocalVectorStore):
+            documents = [
+                Document(page_content=chunk, metadata=metadata)
+                for chunk, metadata in zip(chunks, metadatas)
+            ]
+            vector_store.add_embeddings(documents, vectors, ids)
+        else:
+            # Same record layout PineconeVectorStore.add_texts writes
+            text_key = vector_store._text_key
+            vector_store.index.upsert(
+                vectors=[
+                    (vector_id, vector, {**metadata, text_key: chunk})
+                    for vector_id, vector, metadata, chunk in zip(
+                        ids, vectors, metadatas, chunks
+                    )
+                ],
+                namespace=vector_store._namespace,
+            )
+    return ids
+
+
+def search_collection(vector_store, query, video_ids, k=10):
+    """
+    Search for similar documents across several videos at once.
+
+    One query with a "$in" filter covers the whole collection: Pinecone
+    answers it in a single round-trip and the local store scores each video's
+    partition and merges by similarity.
+    """
+    with span("search", k=k, videos=len(video_ids)) as record:
+        results = vector_store.similarity_search(
+            query,
+            k=k,
+            filter={"source_video": {"$in": list(video_ids)}},
+        )
+        record["results"] = len(results)
+    return results
 
 
 def search_similar(vector_store, query, youtube_id, k=10):
     """Search for similar documents in Pinecone."""
-    results = vector_store.similarity_search(
-        query,
-        k=k,
-        filter={"source_video": youtube_id},
-    )
+    with span("search", k=k) as record:
+        results = vector_store.similarity_search(
+            query,
+            k=k,
+            filter={"source_video": youtube_id},
+        )
+        record["results"] = len(results)
     return results
+
+
+def search_with_vectors(vector_store, query_vector, video_ids, k=50):
+    """
+    Fetch the k nearest chunks of some videos together with their embeddings.
+
+    Args:
+        vector_store: PineconeVectorStore or LocalVectorStore
+        query_vector: Embedded query
+        video_ids: Videos to search
+        k: Number of candidates
+
+    Returns:
+        Tuple of (Documents, float32 matrix with one embedding row per Document)
+    """
+    search_filter = {"source_video": {"$in": list(video_ids)}}
+    with span("search", k=k, videos=len(video_ids), vectors=True) as record:
+        if isinstance(vector_store, LocalVectorStore):
+            documents, vectors = vector_store.similarity_search_by_vector_with_vectors(
+                query_vector, k=k, filter=search_filter
+            )
+        else:
+            response = vector_store.index.query(
+                vector=list(query_vector),
+                top_k=k,
+                filter=search_filter,
+                include_values=True,
+                include_metadata=True,
+                namespace=vector_store._namespace,
+            )
+            documents = []
+            for match in response.matches:
+                metadata = dict(match.metadata)
+                text = metadata.pop(vector_store._text_key, "")
+                documents.append(
+                    Document(id=match.id, page_content=text, metadata=metadata)
+                )
+            vectors = np.array(
+                [match.values for match in response.matches], dtype=np.float32
+            )
+        record["results"] = len(documents)
+    return documents, vectors
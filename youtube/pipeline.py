@@ -0,0 +1,142 @@
+"""
+Streaming ingestion pipeline that overlaps embedding and upserting.
+
+Chunks flow from the splitter in batches: the calling thread embeds batch
+n + 1 while a worker thread upserts batch n. A bounded queue between the two
+stages applies backpressure, so at most PIPELINE_QUEUE_SIZE embedded batches
+are held in memory regardless of transcript length.
+
+When given the transcript store, each embedded and each upserted batch is
+checkpointed there. A retry then skips the chunks already upserted, as long as
+they hash to the checkpointed digest; chunks embedded but not yet upserted are
+served by the embedding cache.
+"""
+
+import contextvars
+import queue
+import threading
+from itertools import chain, islice
+
+from pinecone_manager import upsert_vectors
+from data_manager import fingerprint_hasher, update_fingerprint
+from config import EMBED_BATCH_SIZE, PIPELINE_QUEUE_SIZE
+
+_DONE = object()
+
+
+def _batches(items, size, start=0):
+    """Yield (start position, list of items) batches from an iterable."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield start, batch
+        start += len(batch)
+
+
+def cached_chunk_stream(chunks, timings):
+    """Pair cached chunks with their timings (None when unknown) for stream_upload."""
+    if timings is None:
+        timings = [None] * len(chunks)
+    return zip(chunks, timings)
+
+
+def stream_upload(
+    vector_store,
+    youtube_id,
+    chunk_stream,
+    batch_size=EMBED_BATCH_SIZE,
+    queue_size=PIPELINE_QUEUE_SIZE,
+    data=None,
+):
+    """
+    Embed and upsert a stream of chunks with the two stages overlapped.
+
+    Args:
+        vector_store: PineconeVectorStore or LocalVectorStore
+        youtube_id: YouTube video ID
+        chunk_stream: Iterable of (chunk, [start, end] or None) pairs, e.g.
+            chunking.iterTranscriptChunks(snippets)
+        batch_size: Chunks per embedding request and upsert
+        queue_size: Embedded batches that may wait for upsert
+        data: TranscriptStore to checkpoint progress in and resume from
+
+    Returns:
+        Tuple of (chunks, timings) that were uploaded, for the transcript cache
+    """
+    chunk_stream = iter(chunk_stream)
+    chunks = []
+    timings = []
+    digest = fingerprint_hasher()
+
+    progress = data.get_progress(youtube_id) if data is not None else None
+    if progress is not None and progress["upserted"]:
+        prefix = list(islice(chunk_stream, progress["upserted"]))
+        texts = [chunk for chunk, _ in prefix]
+        resumed = update_fingerprint(fingerprint_hasher(), texts)
+        if resumed.hexdigest() == progress["digest"]:
+            print(f"↻ Resuming {youtube_id} after {len(texts)} uploaded chunks")
+            chunks = texts
+            timings = [timing for _, timing in prefix]
+            digest = resumed
+        else:
+            # The transcript or target changed since the checkpoint; start over
+            chunk_stream = chain(prefix, chunk_stream)
+
+    state = {"embedded": len(chunks), "upserted": len(chunks)}
+    state_lock = threading.Lock()
+
+    def checkpoint(embedded=None, upserted=()):
+        with state_lock:
+            if embedded is not None:
+                state["embedded"] = embedded
+            update_fingerprint(digest, upserted)
+            state["upserted"] += len(upserted)
+            if data is not None:
+                data.put_progress(
+                    youtube_id, state["embedded"], state["upserted"], digest.hexdigest()
+                )
+
+    pending = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    def upserter():
+        while True:
+            item = pending.get()
+            if item is _DONE:
+                return
+            if errors:
+                continue  # Drain so the producer never blocks on a dead worker
+            try:
+                upsert_vectors(vector_store, youtube_id, *item)
+                checkpoint(upserted=item[1])
+            except Exception as e:
+                errors.append(e)
+
+    # Run in a copy of this context so upsert spans join the caller's trace()
+    worker = threading.Thread(
+        target=contextvars.copy_context().run, args=(upserter,), daemon=True
+    )
+    worker.start()
+
+    try:
+        for start, batch in _batches(chunk_stream, batch_size, len(chunks)):
+            if errors:
+                break
+            texts = [chunk for chunk, _ in batch]
+            batch_timings = [timing for _, timing in batch]
+            vectors = vector_store.embeddings.embed_documents(texts)
+            checkpoint(embedded=start + len(texts))
+            pending.put((start, texts, batch_timings, vectors))
+            chunks.extend(texts)
+            timings.extend(batch_timings)
+    finally:
+        pending.put(_DONE)
+        worker.join()
+
+    if errors:
+        raise errors[0]
+
+    print(f"✓ Uploaded {len(chunks)} chunks to the vector store")
+    return chunks, timings
@@ -0,0 +1,148 @@
+"""
+Two-stage retrieval: wide recall from the vector store, then a local rerank.
+
+Stage one fetches RERANK_FETCH_K candidates together with their embeddings
+(plus any BM25 hits the vector search missed, embedded through the embedding
+cache). Stage two reranks those candidates in-process and keeps only
+RERANK_K of them, by default with maximal marginal relevance so overlapping
+chunks do not crowd out the rest of the context. Rerankers are plain
+functions registered in RERANKERS.
+"""
+
+import numpy as np
+
+from lexical_index import get_lexical_index, hybrid_search, hybrid_search_collection
+from pinecone_manager import search_with_vectors
+from metrics import span
+from config import (
+    MMR_LAMBDA,
+    RERANK_FETCH_K,
+    RERANK_K,
+    RERANK_METHOD,
+    RETRIEVAL_MODE,
+    SEARCH_K,
+)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def mmr(query_vector, vectors, k, lambda_mult=MMR_LAMBDA):
+    """
+    Select candidates by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    lambda * sim(query, c) - (1 - lambda) * max sim(c, already selected),
+    using one matrix product for all pairwise similarities.
+
+    Returns:
+        Indices of the selected rows, best first
+    """
+    if len(vectors) == 0:
+        return []
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    query = _normalize(np.asarray(query_vector, dtype=np.float32))
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarity[selected[0]].copy()
+    for _ in range(min(k, len(vectors)) - 1):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return selected
+
+
+def by_similarity(query_vector, vectors, k):
+    """Select the k candidates most similar to the query."""
+    if len(vectors) == 0:
+        return []
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    query = _normalize(np.asarray(query_vector, dtype=np.float32))
+    return [int(i) for i in np.argsort(-(vectors @ query))[:k]]
+
+
+# Rerankers take (query vector, candidate matrix, k) and return row indices
+RERANKERS = {
+    "mmr": mmr,
+    "similarity": by_similarity,
+}
+
+
+def _chunk_key(doc):
+    return (doc.metadata.get("source_video"), doc.metadata.get("chunk"))
+
+
+def two_stage_search(
+    vector_store,
+    query,
+    video_ids,
+    k=RERANK_K,
+    fetch_k=RERANK_FETCH_K,
+    method=RERANK_METHOD,
+    query_vector=None,
+):
+    """
+    Fetch a wide candidate set with embeddings and rerank it locally.
+
+    Args:
+        vector_store: PineconeVectorStore or LocalVectorStore
+        query: User question
+        video_ids: Videos to search
+        k: Chunks to return
+        fetch_k: Candidates to fetch in stage one
+        method: Name of the reranker in RERANKERS
+        query_vector: Embedded query, if the caller already has it
+
+    Returns:
+        List of the k selected Documents, best first
+    """
+    if query_vector is None:
+        query_vector = vector_store.embeddings.embed_query(query)
+    documents, vectors = search_with_vectors(
+        vector_store, query_vector, video_ids, k=fetch_k
+    )
+
+    # Keep keyword recall: add the best BM25 hits the vector search missed
+    lexical = get_lexical_index().search_videos(query, video_ids, k=k)
+    seen = {_chunk_key(doc) for doc in documents}
+    extra = []
+    for doc, _ in lexical:
+        if _chunk_key(doc) not in seen:
+            seen.add(_chunk_key(doc))
+            extra.append(doc)
+    if extra:
+        extra_vectors = np.asarray(
+            vector_store.embeddings.embed_documents([d.page_content for d in extra]),
+            dtype=np.float32,
+        )
+        vectors = np.vstack(
+            [vectors.reshape(-1, extra_vectors.shape[1]), extra_vectors]
+        )
+        documents = documents + extra
+
+    with span("rerank", method=method, candidates=len(documents)) as record:
+        picks = RERANKERS[method](query_vector, vectors, k)
+        record["results"] = len(picks)
+    return [documents[i] for i in picks]
+
+
+def retrieve(vector_store, query, video_ids, k=SEARCH_K, query_vector=None):
+    """
+    Retrieve the context chunks for a question with the configured mode.
+
+    "two_stage" returns RERANK_K reranked chunks; "hybrid" returns the top k
+    of BM25 and vector search fused with reciprocal rank fusion.
+    """
+    if RETRIEVAL_MODE == "two_stage":
+        return two_stage_search(
+            vector_store, query, video_ids, query_vector=query_vector
+        )
+    if len(video_ids) == 1:
+        return hybrid_search(vector_store, query, video_ids[0], k=k)
+    return hybrid_search_collection(vector_store, query, video_ids, k=k)
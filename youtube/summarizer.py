@@ -0,0 +1,231 @@
+"""
+Map-reduce summarization of long videos with cached partial summaries.
+
+Usage:
+    python summarizer.py https://www.youtube.com/watch?v=...
+
+The transcript chunks are merged into sections of about SUMMARY_GROUP_CHARS
+characters, labelled with their time range, and all sections are summarized
+in parallel (map). Partial summaries are then merged SUMMARY_FANIN at a time,
+again in parallel, until few enough remain for the final prompt (reduce), so
+wall time is one map round plus a logarithmic number of reduce rounds. Every
+step is cached by (model, prompt, input), so reruns and edits to the final
+prompt only regenerate what actually changed.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from transcript import extract_video_id, fetchTranscript, format_timestamp
+from chunking import splitTranscript
+from context_builder import merge_text
+from data_manager import load_data, get_transcript, get_timings
+from llm_handler import initialize_llm
+from summary_cache import SummaryCache
+from metrics import span
+from config import LLM_MODEL, SUMMARY_FANIN, SUMMARY_GROUP_CHARS, SUMMARY_WORKERS
+
+MAP_PROMPT = (
+    "You summarize one section of a video transcript. Write a few bullet "
+    "points covering its main points, names, numbers and conclusions. Start "
+    "each bullet with the timestamp (HH:MM:SS) where the point is made, "
+    "within the section's time range."
+)
+
+REDUCE_PROMPT = (
+    "You merge consecutive section summaries of one video into a single list "
+    "of bullet points in time order. Keep the most important points with "
+    "their timestamps (HH:MM:SS) and drop repetition."
+)
+
+FINAL_PROMPT = (
+    "You write the final summary of a video from its section summaries. Open "
+    "with two or three sentences on what the whole video is about, then list "
+    "the key moments as bullet points in time order, each starting with its "
+    "timestamp (HH:MM:SS)."
+)
+
+
+def group_chunks(chunks, timings=None, group_chars=SUMMARY_GROUP_CHARS):
+    """
+    Merge consecutive chunks into sections for the map step.
+
+    The splitter's overlap is dropped at chunk boundaries. Sections depend
+    only on the chunks and group_chars, never on the worker count, so their
+    cached summaries stay valid between runs.
+
+    Returns:
+        List of dicts with the section text and its start and end seconds,
+        None when unknown
+    """
+    if timings is None:
+        timings = [None] * len(chunks)
+    sections = []
+    for chunk, timing in zip(chunks, timings):
+        start, end = timing if timing is not None else (None, None)
+        last = sections[-1] if sections else None
+        if last is not None and len(last["text"]) + len(chunk) <= group_chars:
+            last["text"] = merge_text(last["text"], chunk)
+            last["end"] = end if last["end"] is not None else None
+        else:
+            sections.append({"text": chunk, "start": start, "end": end})
+    return sections
+
+
+def _label(part, number):
+    if part["start"] is None or part["end"] is None:
+        return f"[Section {number}]"
+    return f"[{format_timestamp(part['start'])}-{format_timestamp(part['end'])}]"
+
+
+def _model_name(llm):
+    return str(getattr(llm, "model", None) or LLM_MODEL)
+
+
+class Summarizer:
+    """
+    Summarize transcripts with a shared LLM, worker pool and summary cache.
+
+    Safe to share between threads; every summarize() call reports how many
+    LLM calls it made and how many steps were served from the cache.
+    """
+
+    def __init__(
+        self,
+        llm,
+        cache=None,
+        group_chars=SUMMARY_GROUP_CHARS,
+        fanin=SUMMARY_FANIN,
+        workers=SUMMARY_WORKERS,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.group_chars = group_chars
+        self.fanin = max(2, fanin)
+        self.workers = workers
+
+    def _generate(self, prompt, text):
+        """Run one summarization step, from the cache when possible."""
+        key = None
+        if self.cache is not None:
+            key = SummaryCache.key(_model_name(self.llm), prompt, text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, True
+        response = self.llm.invoke([("system", prompt), ("human", text)])
+        summary = response.content
+        if key is not None:
+            self.cache.put(key, summary)
+        return summary, False
+
+    def _round(self, pool, name, prompt, inputs, stats):
+        """Run one map or reduce round in parallel, keeping input order."""
+        with span("summarize", step=name, parts=len(inputs)) as record:
+            results = list(pool.map(lambda text: self._generate(prompt, text), inputs))
+            hits = sum(cached for _, cached in results)
+            record["cache_hits"] = hits
+        stats["rounds"].append(len(inputs))
+        stats["llm_calls"] += len(inputs) - hits
+        stats["cache_hits"] += hits
+        return [summary for summary, _ in results]
+
+    def summarize(self, chunks, timings=None):
+        """
+        Summarize a transcript hierarchically.
+
+        Args:
+            chunks: Transcript chunks in order
+            timings: [start, end] seconds per chunk, or None if unknown
+
+        Returns:
+            Dict with the timestamped "summary", the number of parts in each
+            round, LLM calls made and steps served from the cache
+        """
+        if not chunks:
+            raise ValueError("Nothing to summarize")
+        stats = {"rounds": [], "llm_calls": 0, "cache_hits": 0}
+        parts = group_chunks(chunks, timings, self.group_chars)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            summaries = self._round(
+                pool,
+                "map",
+                MAP_PROMPT,
+                [
+                    f"{_label(part, i)}\n{part['text']}"
+                    for i, part in enumerate(parts, start=1)
+                ],
+                stats,
+            )
+            for part, summary in zip(parts, summaries):
+                part["text"] = summary
+
+            while len(parts) > self.fanin:
+                groups = [
+                    parts[i : i + self.fanin] for i in range(0, len(parts), self.fanin)
+                ]
+                summaries = self._round(
+                    pool,
+                    "reduce",
+                    REDUCE_PROMPT,
+                    [self._join(group) for group in groups],
+                    stats,
+                )
+                parts = [
+                    {
+                        "text": summary,
+                        "start": group[0]["start"],
+                        "end": group[-1]["end"],
+                    }
+                    for group, summary in zip(groups, summaries)
+                ]
+
+            (summary,) = self._round(
+                pool, "final", FINAL_PROMPT, [self._join(parts)], stats
+            )
+        return {"summary": summary, **stats}
+
+    @staticmethod
+    def _join(parts):
+        return "\n\n".join(
+            f"{_label(part, i)}\n{part['text'].strip()}"
+            for i, part in enumerate(parts, start=1)
+        )
+
+
+def main():
+    """Summarization flow."""
+    parser = argparse.ArgumentParser(description="Summarize a YouTube video.")
+    parser.add_argument("video", help="YouTube URL or video ID")
+    parser.add_argument("--workers", type=int, default=SUMMARY_WORKERS)
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Regenerate every partial summary"
+    )
+    args = parser.parse_args()
+
+    video_id = extract_video_id(args.video)
+    data = load_data()
+    chunks = get_transcript(data, video_id)
+    if chunks is not None:
+        timings = get_timings(data, video_id)
+    else:
+        # Summaries do not need the video indexed, only split
+        chunks, timings = splitTranscript(fetchTranscript(video_id))
+
+    summarizer = Summarizer(
+        initialize_llm(),
+        cache=None if args.no_cache else SummaryCache(),
+        workers=args.workers,
+    )
+    with span("summarize_video") as record:
+        result = summarizer.summarize(chunks, timings)
+    print(result["summary"])
+    print(
+        f"\n[{len(chunks)} chunks, rounds of {' → '.join(map(str, result['rounds']))} "
+        f"parts, {result['llm_calls']} LLM calls, {result['cache_hits']} cached, "
+        f"{record['ms'] / 1000:.1f}s]"
+    )
+
+
+if __name__ == "__main__":
+    main()
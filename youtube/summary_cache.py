@@ -0,0 +1,49 @@
+"""
+Summary cache module for reusing partial and final video summaries.
+"""
+
+import hashlib
+
+from lru_store import LRUStore
+from config import SUMMARY_CACHE_PATH, SUMMARY_CACHE_MAX_ENTRIES
+
+
+class SummaryCache:
+    """
+    Content-addressed, size-bounded LRU cache of summaries backed by SQLite.
+
+    Summaries are keyed by a hash of (model name, prompt, input text), so
+    every map and reduce step is only ever generated once per model and
+    prompt, and editing one prompt leaves the other levels' entries valid.
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_PATH, max_entries=SUMMARY_CACHE_MAX_ENTRIES):
+        self.hits = 0
+        self.misses = 0
+        self._cache = LRUStore(path, "summaries", "summary TEXT", max_entries)
+
+    @staticmethod
+    def key(model_name, prompt, text):
+        """Hash the model, prompt and input text into a cache key."""
+        digest = hashlib.sha256()
+        for part in (model_name, prompt, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached summary for a key, or None on a miss."""
+        summary = self._cache.get(key)
+        if summary is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return summary
+
+    def put(self, key, summary):
+        """Store a summary, evicting the least recently used overflow."""
+        self._cache.put(key, summary)
+
+    def stats(self):
+        """Return hit/miss counters and the current number of cached summaries."""
+        return {"hits": self.hits, "misses": self.misses, "size": self._cache.size()}
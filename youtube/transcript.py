@@ -2,7 +2,9 @@
 YouTube transcript fetching module.
 """
 
-from youtube_transcript_api import YouTubeTranscriptApi
+from data_manager import get_transcript
+from metrics import span
+from transcript_fetcher import get_fetcher
 
 
 def extract_video_id(url_or_id):
@@ -23,32 +25,34 @@ def extract_video_id(url_or_id):
     return youtube_id
 
 
+def format_timestamp(seconds):
+    """Convert seconds to HH:MM:SS format."""
+    seconds = int(seconds)
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    return f"{hours:02}:{minutes:02}:{seconds % 60:02}"
+
+
 def cleanData(transcript_list):
     """
-    Format: [00:12:30] The speaker said this text...
-    """
-    full_text = ""
-    for snippet in transcript_list:
-        # Convert seconds to HH:MM:SS format
-        start_seconds = int(snippet.start)
-        hours = start_seconds // 3600
-        minutes = (start_seconds % 3600) // 60
-        seconds = start_seconds % 60
-        timestamp = f"[{hours:02}:{minutes:02}:{seconds:02}]"
-
-        # Add timestamp to the text every few sentences
-        # (Doing it for every line is too messy, so we do it simply here)
-        full_text += f"{timestamp} {snippet.text} "
+    Join transcript snippets into plain text.
 
-    return full_text
+    Timing is not embedded in the text; use chunking.splitTranscript to keep
+    start and end seconds alongside each chunk.
+    """
+    with span("clean") as record:
+        text = " ".join(
+            text
+            for text in (" ".join(snippet.text.split()) for snippet in transcript_list)
+            if text
+        )
+        record["chars"] = len(text)
+    return text
 
 
 def check_url(youtube_id, data):
     """Check if transcript is already cached."""
-    for i in range(len(data)):
-        if data[i]["videoId"] == youtube_id:
-            return i
-    return -1
+    return youtube_id in data
 
 
 def ApiCall(youtube_id, data):
@@ -63,18 +67,35 @@ def ApiCall(youtube_id, data):
         Transcript text as string
     """
     # Check cache first
-    index = check_url(youtube_id, data)
-    if index != -1:
+    cached = get_transcript(data, youtube_id)
+    if cached is not None:
         # Return cached transcript (already chunked)
         # Joining chunks back to plain text
-        cached = data[index]["transcript"]
         if isinstance(cached, list):
             return " ".join(cached)
         return cached
 
     # Fetch from YouTube API
-    yt_api = YouTubeTranscriptApi()
-    response = yt_api.fetch(youtube_id, ["en", "hi"])
+    response = fetchTranscript(youtube_id)
     filteredData = cleanData(response)
 
     return filteredData
+
+
+def fetchTranscript(youtube_id):
+    """
+    Fetch the timed transcript snippets of a video from YouTube.
+
+    Goes through the shared TranscriptFetcher, which reuses one pooled
+    client and caches both transcripts and "no transcript" results.
+
+    Args:
+        youtube_id: YouTube video ID
+
+    Returns:
+        List of snippets with text, start and duration
+
+    Raises:
+        TranscriptUnavailable: If the video has no usable transcript
+    """
+    return get_fetcher().fetch(youtube_id)
@@ -0,0 +1,259 @@
+"""
+Transcript fetch layer with connection reuse and a persistent fetch cache.
+
+YouTubeTranscriptApi is not thread-safe, so each thread gets its own client
+and requests.Session, but all sessions share one pooled HTTPAdapter, so
+connections are kept alive between videos and threads. Raw transcripts are cached in SQLite for
+FETCH_CACHE_TTL seconds; videos without usable captions are remembered for
+the shorter FETCH_NEGATIVE_TTL, so repeated clicks and reruns of a bulk
+ingestion do not hit YouTube again. Cached snippets are stored
+zlib-compressed and expired entries are deleted on every write, so the cache
+does not grow with every video ever fetched. Concurrent requests for the same
+video share one fetch.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from metrics import span
+from config import (
+    FETCH_CACHE_PATH,
+    FETCH_CACHE_TTL,
+    FETCH_NEGATIVE_TTL,
+    FETCH_POOL_SIZE,
+    PREFETCH_WORKERS,
+    TRANSCRIPT_LANGUAGES,
+)
+
+
+class TranscriptUnavailable(Exception):
+    """Raised when a video has no transcript that can be fetched."""
+
+    def __init__(self, video_id, reason):
+        super().__init__(f"No transcript for {video_id}: {reason}")
+        self.video_id = video_id
+        self.reason = reason
+
+
+def _negative_reason(error):
+    """Map a youtube_transcript_api error to a cacheable reason, or None."""
+    from youtube_transcript_api import (
+        NoTranscriptFound,
+        TranscriptsDisabled,
+        VideoUnavailable,
+    )
+
+    if isinstance(error, TranscriptsDisabled):
+        return "transcripts disabled"
+    if isinstance(error, NoTranscriptFound):
+        return "no transcript in " + ", ".join(TRANSCRIPT_LANGUAGES)
+    if isinstance(error, VideoUnavailable):
+        return "video unavailable"
+    return None
+
+
+class TranscriptFetcher:
+    """
+    Fetch transcripts through one pooled client, with TTL and negative caching.
+
+    Safe to share between threads: each thread talks to YouTube through its
+    own client over the shared connection pool. fetch() returns a list of snippets with
+    text, start and duration, like the fetched transcript it caches.
+    """
+
+    def __init__(
+        self,
+        path=FETCH_CACHE_PATH,
+        ttl=FETCH_CACHE_TTL,
+        negative_ttl=FETCH_NEGATIVE_TTL,
+        pool_size=FETCH_POOL_SIZE,
+        prefetch_workers=PREFETCH_WORKERS,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.pool_size = pool_size
+        self.prefetch_workers = prefetch_workers
+        self._adapter = None
+        self._local = threading.local()
+        self._executor = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fetches ("
+            "video_id TEXT PRIMARY KEY, snippets TEXT, reason TEXT, "
+            "fetched_at REAL NOT NULL)"
+        )
+        with self._conn:
+            self._purge_expired()
+
+    def _client(self):
+        """Return this thread's API client, created on first use."""
+        api = getattr(self._local, "api", None)
+        if api is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from youtube_transcript_api import YouTubeTranscriptApi
+
+            with self._lock:
+                if self._adapter is None:
+                    self._adapter = HTTPAdapter(
+                        pool_connections=self.pool_size, pool_maxsize=self.pool_size
+                    )
+            session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            api = self._local.api = YouTubeTranscriptApi(http_client=session)
+        return api
+
+    def _cached(self, video_id):
+        """Return (snippets, reason) for a fresh cache entry, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT snippets, reason, fetched_at FROM fetches WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        snippets, reason, fetched_at = row
+        ttl = self.ttl if reason is None else self.negative_ttl
+        if time.time() - fetched_at > ttl:
+            return None
+        return snippets, reason
+
+    def _purge_expired(self):
+        """Delete entries older than their TTL; the caller holds the lock."""
+        now = time.time()
+        self._conn.execute(
+            "DELETE FROM fetches WHERE fetched_at < "
+            "CASE WHEN reason IS NULL THEN ? ELSE ? END",
+            (now - self.ttl, now - self.negative_ttl),
+        )
+
+    def _store(self, video_id, snippets=None, reason=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetches (video_id, snippets, reason, fetched_at) "
+                "VALUES (?, ?, ?, ?)",
+                (video_id, snippets, reason, time.time()),
+            )
+            self._purge_expired()
+
+    def _download(self, video_id):
+        """Fetch from YouTube and cache the result, positive or negative."""
+        with span("fetch") as record:
+            record["cache_hit"] = False
+            try:
+                response = self._client().fetch(video_id, TRANSCRIPT_LANGUAGES)
+            except Exception as e:
+                reason = _negative_reason(e)
+                if reason is None:
+                    raise  # Network trouble and the like are worth retrying
+                self._store(video_id, reason=reason)
+                raise TranscriptUnavailable(video_id, reason) from e
+            snippets = list(response)
+            record["snippets"] = len(snippets)
+        payload = json.dumps([[s.text, s.start, s.duration] for s in snippets])
+        self._store(video_id, snippets=zlib.compress(payload.encode("utf-8")))
+        return snippets
+
+    def fetch(self, video_id):
+        """
+        Return a video's transcript snippets, from the cache when fresh.
+
+        Raises:
+            TranscriptUnavailable: If the video has no usable transcript, now
+                or within the negative cache TTL
+        """
+        cached = self._cached(video_id)
+        if cached is not None:
+            snippets, reason = cached
+            with span("fetch") as record:
+                record["cache_hit"] = True
+                if reason is not None:
+                    raise TranscriptUnavailable(video_id, reason)
+                from youtube_transcript_api import FetchedTranscriptSnippet
+
+                # Rows cached before compression hold plain JSON text
+                if isinstance(snippets, bytes):
+                    snippets = zlib.decompress(snippets)
+                snippets = [
+                    FetchedTranscriptSnippet(text=text, start=start, duration=duration)
+                    for text, start, duration in json.loads(snippets)
+                ]
+                record["snippets"] = len(snippets)
+            return snippets
+
+        # Concurrent fetches of one video share a single download
+        with self._lock:
+            future = self._in_flight.get(video_id)
+            owner = future is None
+            if owner:
+                future = self._in_flight[video_id] = Future()
+        if not owner:
+            return future.result()
+        try:
+            snippets = self._download(video_id)
+            future.set_result(snippets)
+            return snippets
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[video_id]
+
+    def prefetch(self, video_ids, limit=None):
+        """
+        Fetch videos into the cache in the background.
+
+        Args:
+            video_ids: Videos to fetch
+            limit: Optional semaphore held during each prefetch, so prefetches
+                count against the caller's own cap on requests to YouTube
+
+        Returns:
+            Futures for the videos that were not cached yet; failures are
+            cached or left for the foreground fetch to report
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.prefetch_workers,
+                    thread_name_prefix="prefetch",
+                )
+            executor = self._executor
+        return [
+            executor.submit(self._prefetch_one, video_id, limit)
+            for video_id in dict.fromkeys(video_ids)
+            if self._cached(video_id) is None
+        ]
+
+    def _prefetch_one(self, video_id, limit=None):
+        try:
+            if limit is None:
+                self.fetch(video_id)
+            else:
+                with limit:
+                    self.fetch(video_id)
+            return True
+        except Exception:
+            return False
+
+
+_shared_fetcher = None
+_shared_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the process-wide transcript fetcher."""
+    global _shared_fetcher
+    with _shared_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = TranscriptFetcher()
+        return _shared_fetcher